@@ -0,0 +1,332 @@
+import argparse
+import json
+import os
+import shutil
+import threading
+import uuid
+
+import numpy as np
+from pymongo import MongoClient
+
+from common import FLOAT, STRING, load_columns, stored_data_version
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+#zestawienia całej ligi (wyniki, strzelcy, asystenci, xG, statystyki na 90
+#minut) jako SQL w DuckDB po plikach Parquet zamiast ściągania dokumentów z
+#Mongo do pandas; DuckDB czyta tylko potrzebne kolumny i liczy na wszystkich
+#rdzeniach. Eksport dzieli pliki według sezonu i meczu, więc kolejne sezony
+#dopisują się obok. Pusty PARQUET_DIR wyłącza eksport.
+
+MONGO_URI = "mongodb://localhost:27017/"
+DB_NAME = "football_data"
+PARQUET_DIR = os.environ.get(
+    "PARQUET_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "parquet"))
+
+#tabela: (kolekcja, {pole: typ SQL}, kolumny podziału katalogów)
+TABLES = {
+    'matches': ('matches', {
+        'match_id': 'BIGINT',
+        'match_date': 'VARCHAR',
+        'match_week': 'BIGINT',
+        'home_team': 'VARCHAR',
+        'away_team': 'VARCHAR',
+        'home_score': 'BIGINT',
+        'away_score': 'BIGINT',
+    }, ['season_id']),
+    'lineups': ('lineups', {
+        'match_id': 'BIGINT',
+        'team': 'VARCHAR',
+        'player_id': 'BIGINT',
+        'player_name': 'VARCHAR',
+        'player_nickname': 'VARCHAR',
+        'jersey_number': 'BIGINT',
+    }, ['season_id', 'match_id']),
+    'events': ('events', {
+        'id': 'VARCHAR',
+        'match_id': 'BIGINT',
+        'index': 'BIGINT',
+        'period': 'BIGINT',
+        'minute': 'BIGINT',
+        'second': 'BIGINT',
+        'type': 'VARCHAR',
+        'team': 'VARCHAR',
+        'player_id': 'BIGINT',
+        'player': 'VARCHAR',
+        'position': 'VARCHAR',
+        'x': 'DOUBLE',
+        'y': 'DOUBLE',
+        'end_x': 'DOUBLE',
+        'end_y': 'DOUBLE',
+        'shot_statsbomb_xg': 'DOUBLE',
+        'shot_outcome': 'VARCHAR',
+        'shot_type': 'VARCHAR',
+        'shot_key_pass_id': 'VARCHAR',
+        'pass_outcome': 'VARCHAR',
+        'pass_recipient_id': 'BIGINT',
+    }, ['season_id', 'match_id']),
+    #minuty z derived.py, mianownik statystyk na 90 minut
+    'players': ('player_season_stats', {
+        'player_id': 'BIGINT',
+        'player_name': 'VARCHAR',
+        'player_nickname': 'VARCHAR',
+        'team': 'VARCHAR',
+        'minutes': 'DOUBLE',
+        'appearances': 'BIGINT',
+    }, ['season_id']),
+}
+#liczby wczytywane jako float (brak wartości to NaN), rzutowane w SQL
+LOAD_KINDS = {'BIGINT': FLOAT, 'DOUBLE': FLOAT, 'VARCHAR': STRING}
+
+PER90_STATS = {
+    'goals': "count(*) FILTER (WHERE type = 'Shot' AND shot_outcome = 'Goal')",
+    'shots': "count(*) FILTER (WHERE type = 'Shot')",
+    'xg': "sum(shot_statsbomb_xg)",
+    'passes': "count(*) FILTER (WHERE type = 'Pass' AND pass_outcome IS NULL)",
+}
+XG_GROUPS = ['team', 'player']
+
+
+def _path(path):
+    return path.replace("'", "''")
+
+
+def export_parquet(db, season_id, root=None):
+    #root=None: PARQUET_DIR z chwili wywołania
+    root = PARQUET_DIR if root is None else root
+    if not root or duckdb is None:
+        return {}
+    tmp = os.path.join(root, f".{uuid.uuid4().hex}.tmp")
+    os.makedirs(tmp)
+    con = duckdb.connect()
+    counts = {}
+    try:
+        for table, (collection, columns, partitions) in TABLES.items():
+            frame = load_columns(
+                db[collection], {},
+                {field: LOAD_KINDS[sql] for field, sql in columns.items()})
+            con.register('frame', frame)
+            if len(frame):
+                select = ', '.join(f'CAST("{field}" AS {sql}) AS "{field}"'
+                                   for field, sql in columns.items())
+                con.execute(
+                    f"COPY (SELECT {int(season_id)} AS season_id, {select} "
+                    f"FROM frame) TO '{_path(os.path.join(tmp, table))}' "
+                    f"(FORMAT PARQUET, PARTITION_BY ({', '.join(partitions)}))")
+            else:
+                #pusta kolekcja (np. player_season_stats przed derived.py):
+                #jeden plik bez wierszy z typami kolumn, żeby widok tabeli
+                #w Analytics miał co czytać
+                values = {'season_id': int(season_id)}
+                directory = os.path.join(
+                    tmp, table, *(f"{partition}={values.get(partition, 0)}"
+                                  for partition in partitions))
+                os.makedirs(directory)
+                select = ', '.join(f'CAST(NULL AS {sql}) AS "{field}"'
+                                   for field, sql in columns.items()
+                                   if field not in partitions)
+                con.execute(
+                    f"COPY (SELECT {select} LIMIT 0) TO "
+                    f"'{_path(os.path.join(directory, 'data_0.parquet'))}' "
+                    f"(FORMAT PARQUET)")
+            con.unregister('frame')
+            counts[table] = len(frame)
+
+        #podmiana katalogu sezonu w każdej tabeli; pozostałe sezony zostają
+        for table in TABLES:
+            season = f"season_id={int(season_id)}"
+            target = os.path.join(root, table, season)
+            old = f"{target}.{uuid.uuid4().hex}.old"
+            os.makedirs(os.path.join(root, table), exist_ok=True)
+            if os.path.exists(target):
+                os.replace(target, old)
+            if os.path.exists(os.path.join(tmp, table, season)):
+                os.replace(os.path.join(tmp, table, season), target)
+            shutil.rmtree(old, ignore_errors=True)
+    finally:
+        con.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    with open(os.path.join(root, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                'data_version': stored_data_version(db),
+                'season_id': int(season_id),
+                'rows': counts,
+            }, f)
+    return counts
+
+
+class Analytics:
+    #widoki na pliki Parquet jednego sezonu (season_id=None: wszystkie);
+    #połączenie DuckDB nie jest bezpieczne dla wątków, więc każdy wątek
+    #dostaje własny kursor
+    def __init__(self, root=None, season_id=None):
+        root = PARQUET_DIR if root is None else root
+        with open(os.path.join(root, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.version = self.meta['data_version']
+        self.season_id = season_id
+        self.con = duckdb.connect()
+        where = ("" if season_id is None else
+                 f" WHERE season_id = {int(season_id)}")
+        for table in TABLES:
+            files = os.path.join(root, table, "**", "*.parquet")
+            self.con.execute(
+                f"CREATE VIEW {table} AS SELECT * FROM read_parquet("
+                f"'{_path(files)}', hive_partitioning = true){where}")
+        self.local = threading.local()
+
+    def query(self, sql, params=None):
+        cursor = getattr(self.local, 'cursor', None)
+        if cursor is None:
+            cursor = self.local.cursor = self.con.cursor()
+        return cursor.execute(sql, params or []).df()
+
+    def close(self):
+        self.con.close()
+
+    def team_results(self):
+        #jak common.team_results: najpierw gospodarze, potem goście
+        return self.query("""
+            WITH sides AS (
+                SELECT match_id, match_week, home_team AS team,
+                       away_team AS opponent, true AS home, home_team,
+                       away_team, home_score, away_score,
+                       home_score AS goals_for, away_score AS goals_against
+                FROM matches
+                UNION ALL
+                SELECT match_id, match_week, away_team, home_team, false,
+                       home_team, away_team, home_score, away_score,
+                       away_score, home_score
+                FROM matches)
+            SELECT *,
+                   goals_for > goals_against AS win,
+                   goals_for = goals_against AS draw,
+                   goals_for < goals_against AS loss,
+                   CAST(CASE WHEN goals_for > goals_against THEN 3
+                             WHEN goals_for = goals_against THEN 1
+                             ELSE 0 END AS BIGINT) AS points,
+                   CASE WHEN goals_for > goals_against THEN 'W'
+                        WHEN goals_for = goals_against THEN 'D'
+                        ELSE 'L' END AS result,
+                   goals_against = 0 AS clean_sheet,
+                   goals_for = 0 AS failed_to_score
+            FROM sides
+            ORDER BY home DESC, match_id""")
+
+    def top_scorers(self):
+        #kolumny i kolejność jak home.generate_top_scorers
+        return self._ranking("""
+            SELECT player AS "Player", team AS "Team", count(*) AS "Goals",
+                   count(*) FILTER (WHERE shot_type = 'Penalty') AS "Pen.",
+                   count(*) FILTER (WHERE shot_type = 'Free Kick') AS "FK",
+                   "Goals" - "Pen." - "FK" AS "Open Play"
+            FROM events
+            WHERE type = 'Shot' AND shot_outcome = 'Goal'
+              AND player IS NOT NULL AND team IS NOT NULL
+            GROUP BY player, team
+            ORDER BY "Goals" DESC, player, team""")
+
+    def top_assistants(self):
+        #podanie kluczowe do gola, jak common.resolve_assists
+        return self._ranking("""
+            SELECT pass.player AS "Player", pass.team AS "Team",
+                   count(*) AS "Assists"
+            FROM events AS shot
+            JOIN events AS pass
+              ON pass.match_id = shot.match_id
+             AND pass.id = shot.shot_key_pass_id AND pass.type = 'Pass'
+            WHERE shot.type = 'Shot' AND shot.shot_outcome = 'Goal'
+              AND pass.player IS NOT NULL AND pass.team IS NOT NULL
+            GROUP BY pass.player, pass.team
+            ORDER BY "Assists" DESC, pass.player, pass.team""")
+
+    def xg_table(self, group='team'):
+        #strzały, gole i xG drużyn lub zawodników (notebook 01)
+        if group not in XG_GROUPS:
+            raise ValueError(f"group: {group}")
+        return self._ranking(f"""
+            SELECT {group}, count(*) AS "Shots",
+                   count(*) FILTER (WHERE shot_outcome = 'Goal') AS "Goals",
+                   round(sum(shot_statsbomb_xg), 2) AS "xG",
+                   round("Goals" - sum(shot_statsbomb_xg), 2) AS "Performance"
+            FROM events
+            WHERE type = 'Shot' AND {group} IS NOT NULL
+            GROUP BY {group}
+            ORDER BY "Performance" DESC, {group}""")
+
+    def per90_ranking(self, stat, min_minutes=900, limit=20):
+        #zawodnicy z co najmniej min_minutes minut; w kilku sezonach sumy
+        #minut i zdarzeń, nazwa z ostatniego sezonu
+        if stat not in PER90_STATS:
+            raise ValueError(f"stat: {stat}")
+        return self._ranking(
+            f"""
+            WITH totals AS (
+                SELECT player_id, {PER90_STATS[stat]} AS total
+                FROM events
+                WHERE player_id IS NOT NULL
+                GROUP BY player_id),
+            played AS (
+                SELECT player_id,
+                       arg_max(coalesce(player_nickname, player_name),
+                               season_id) AS player,
+                       string_agg(DISTINCT team, ', ' ORDER BY team) AS team,
+                       sum(minutes) AS minutes
+                FROM players
+                GROUP BY player_id)
+            SELECT player_id, player, team, minutes,
+                   coalesce(total, 0) AS {stat},
+                   round(coalesce(total, 0) * 90 / minutes, 2) AS per90
+            FROM played LEFT JOIN totals USING (player_id)
+            WHERE minutes >= ? AND minutes > 0
+            ORDER BY per90 DESC, player
+            LIMIT ?""", [min_minutes, limit])
+
+    def _ranking(self, sql, params=None):
+        frame = self.query(sql, params)
+        frame.index = np.arange(1, len(frame) + 1)
+        return frame
+
+
+def open_analytics(root=None, version=None):
+    #sezon z ostatniego eksportu; None bez duckdb, bez eksportu albo gdy
+    #eksport jest z innej wersji danych
+    root = PARQUET_DIR if root is None else root
+    if duckdb is None or not root or not os.path.exists(
+            os.path.join(root, "meta.json")):
+        return None
+    with open(os.path.join(root, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    if version is not None and meta['data_version'] != version:
+        return None
+    try:
+        return Analytics(root, meta['season_id'])
+    except duckdb.Error:
+        #niepełny eksport (np. brak plików tabeli); strony liczą z Mongo
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Eksport meczów, składów i zdarzeń z MongoDB do Parquet")
+    parser.add_argument("--season-id",
+                        type=int,
+                        required=True,
+                        help="sezon StatsBomb, do którego należą dane w bazie")
+    args = parser.parse_args()
+    if duckdb is None:
+        print("Eksport wymaga pakietu duckdb")
+        return
+    counts = export_parquet(MongoClient(MONGO_URI)[DB_NAME], args.season_id)
+    print(f"Parquet w {PARQUET_DIR}: " +
+          ", ".join(f"{table} {count}" for table, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
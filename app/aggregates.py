@@ -0,0 +1,188 @@
+import pandas as pd
+from pymongo.errors import OperationFailure
+
+import data
+from utils import count_if, resolve_assists
+
+#zestawienia strony drużyny liczone po stronie MongoDB; do aplikacji trafiają
+#tylko małe wyniki zamiast wszystkich zdarzeń z 38 meczów
+
+GOAL_COLUMNS = ['player_id', 'player', 'goals', 'penalties', 'free_kicks']
+ASSIST_COLUMNS = ['player_id', 'player', 'assists']
+SHOT_COLUMNS = ['player_id', 'player', 'x', 'y', 'shot_outcome']
+
+
+def team_goals_pipeline(team_name):
+    return [
+        {
+            '$match': {
+                'type': 'Shot',
+                'team': team_name,
+                'shot_outcome': 'Goal'
+            }
+        },
+        {
+            '$group': {
+                '_id': '$player_id',
+                'player': {
+                    '$first': '$player'
+                },
+                'goals': {
+                    '$sum': 1
+                },
+                'penalties': count_if({'$eq': ['$shot_type', 'Penalty']}),
+                'free_kicks': count_if({'$eq': ['$shot_type', 'Free Kick']}),
+            }
+        },
+    ]
+
+
+def team_assists_pipeline(team_name, match_ids):
+    #gole z meczów drużyny z podaniem kluczowym jej zawodnika; podanie
+    #dołączane po indeksie na id zdarzenia
+    return [
+        {
+            '$match': {
+                'match_id': {
+                    '$in': list(match_ids)
+                },
+                'type': 'Shot',
+                'shot_outcome': 'Goal',
+                'shot_key_pass_id': {
+                    '$exists': True
+                }
+            }
+        },
+        {
+            '$lookup': {
+                'from': 'events',
+                'localField': 'shot_key_pass_id',
+                'foreignField': 'id',
+                'as': 'key_pass'
+            }
+        },
+        {
+            '$unwind': '$key_pass'
+        },
+        {
+            '$match': {
+                'key_pass.type': 'Pass',
+                'key_pass.team': team_name
+            }
+        },
+        {
+            '$group': {
+                '_id': '$key_pass.player_id',
+                'player': {
+                    '$first': '$key_pass.player'
+                },
+                'assists': {
+                    '$sum': 1
+                }
+            }
+        },
+    ]
+
+
+def team_shots_pipeline(team_name):
+    return [
+        {
+            '$match': {
+                'type': 'Shot',
+                'team': team_name,
+                'x': {
+                    '$exists': True
+                }
+            }
+        },
+        {
+            '$project': {
+                '_id': 0,
+                'player_id': 1,
+                'player': 1,
+                'shot_outcome': 1,
+                'x': 1,
+                'y': 1
+            }
+        },
+    ]
+
+
+def aggregate(pipeline, columns):
+    #None, gdy baza nie obsługuje potoku agregacji albo zdarzenia są w
+    #migawce sezonu (wtedy liczone w pandas bez zapytań do Mongo)
+    if data.get_season_store() is not None:
+        return None
+    try:
+        docs = list(data.get_db().events.aggregate(pipeline))
+    except (OperationFailure, NotImplementedError):
+        return None
+    frame = pd.DataFrame(docs).rename(columns={'_id': 'player_id'})
+    return frame.reindex(columns=columns)
+
+
+def team_goals_fallback(team_name):
+    events = data.get_team_events(team_name)
+    goals = events[(events['type'] == 'Shot') & (events['team'] == team_name)
+                   & (events['shot_outcome'] == 'Goal')]
+    return goals.groupby('player_id', sort=False).agg(
+        player=('player', 'first'),
+        goals=('player', 'size'),
+        penalties=('shot_type', lambda s: (s == 'Penalty').sum()),
+        free_kicks=('shot_type', lambda s: (s == 'Free Kick').sum()),
+    ).reset_index().reindex(columns=GOAL_COLUMNS)
+
+
+def team_assists_fallback(team_name):
+    events = data.get_team_events(team_name)
+    goals = events[(events['type'] == 'Shot')
+                   & (events['shot_outcome'] == 'Goal')]
+    passes = resolve_assists(goals, events,
+                             ['player_id', 'player', 'team'])
+    passes = passes[passes['team'] == team_name]
+    return passes.groupby('player_id', sort=False).agg(
+        player=('player', 'first'),
+        assists=('player', 'size')).reset_index().reindex(
+            columns=ASSIST_COLUMNS)
+
+
+def team_shots_fallback(team_name):
+    events = data.get_team_events(team_name)
+    shots = events[(events['type'] == 'Shot') & (events['team'] == team_name) &
+                   (events['x'].notnull())]
+    return shots.reindex(columns=SHOT_COLUMNS)
+
+
+def with_names(frame):
+    #ksywki według player_id, tak jak w ramkach z data
+    frame = frame.copy()
+    data.with_display_names(events=frame)
+    return frame
+
+
+@data.memoized(maxsize=20)
+def get_team_goals(team_name) -> pd.DataFrame:
+    goals = aggregate(team_goals_pipeline(team_name), GOAL_COLUMNS)
+    if goals is None:
+        goals = team_goals_fallback(team_name)
+    return with_names(goals)
+
+
+@data.memoized(maxsize=20)
+def get_team_assists(team_name) -> pd.DataFrame:
+    matches = data.get_matches()
+    match_ids = matches[(matches['home_team'] == team_name) |
+                        (matches['away_team'] == team_name)]['match_id']
+    assists = aggregate(team_assists_pipeline(team_name, match_ids.tolist()),
+                        ASSIST_COLUMNS)
+    if assists is None:
+        assists = team_assists_fallback(team_name)
+    return with_names(assists)
+
+
+@data.memoized(maxsize=20)
+def get_team_shots(team_name) -> pd.DataFrame:
+    shots = aggregate(team_shots_pipeline(team_name), SHOT_COLUMNS)
+    if shots is None:
+        shots = team_shots_fallback(team_name)
+    return with_names(shots)
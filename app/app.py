@@ -1,18 +1,17 @@
 import dash
-from dash import html, dcc
+from dash import html, dcc, ClientsideFunction
 import dash_bootstrap_components as dbc
-from dash.dependencies import Input, Output
-import pandas as pd
-from pymongo import MongoClient
-from utils import apply_nicknames, internal_team_id
+from dash.dependencies import Input, Output, State
+from flask import jsonify, request
+import data
+import search
+from utils import internal_team_id
 
-client = MongoClient("mongodb://localhost:27017/")
-db = client["football_data"]
-lineups = pd.DataFrame(list(db.lineups.find()))
-lineups = apply_nicknames(lineups=lineups)
+lineups = data.get_lineups()
 
 teams = sorted(lineups["team"].dropna().unique())
-players = sorted(lineups["player_name"].dropna().unique())
+#indeks wyszukiwarki zawodników budowany od razu przy starcie
+search.get_index()
 
 app = dash.Dash(__name__,
                 use_pages=True,
@@ -43,11 +42,8 @@ navbar = dbc.Navbar(dbc.Container([
                 width="auto",
                 className="align-self-center"),
         dbc.Col(dcc.Dropdown(id='player-dropdown',
-                             options=[{
-                                 'label': p,
-                                 'value': p
-                             } for p in players],
-                             placeholder="Select player",
+                             options=[],
+                             placeholder="Search player",
                              className="dark-dropdown",
                              style={"width": "200px"}),
                 width="auto",
@@ -64,42 +60,36 @@ navbar = dbc.Navbar(dbc.Container([
 
 app.layout = html.Div([
     navbar,
+    dcc.Store(id='team-ids', data=internal_team_id()),
     dcc.Location(id='url-dropdown', refresh=True), dash.page_container
 ],
                       className="app-body")
 
 
-@app.callback(Output('player-dropdown', 'options'),
-              Input('team-dropdown', 'value'))
-def update_player_dropdown(selected_team):
-    if selected_team:
-        filtered = lineups[lineups['team'] ==
-                           selected_team]['player_name'].dropna().unique()
-        return [{'label': name, 'value': name} for name in sorted(filtered)]
-    return [{'label': name, 'value': name} for name in players]
-
+@server.route(f"{app.config.routes_pathname_prefix}api/players")
+def player_search():
+    #?q=fragment nazwy&team=drużyna&limit=N; bez q zwraca całą kadrę drużyny
+    return jsonify(
+        search.search_players(request.args.get('q', ''),
+                              request.args.get('team') or None,
+                              request.args.get('limit', search.DEFAULT_LIMIT,
+                                               type=int)))
 
-@app.callback(
-    Output('url-dropdown', 'pathname'),
-    [Input('team-dropdown', 'value'),
-     Input('player-dropdown', 'value')])
-def dropdown_navigation(team_value, player_value):
-    ctx = dash.callback_context
-    if not ctx.triggered:
-        return dash.no_update
 
-    trigger_id = ctx.triggered[0]['prop_id'].split('.')[0]
+#lista zawodników wypełniana z /api/players podczas pisania
+app.clientside_callback(
+    ClientsideFunction(namespace='navigation', function_name='playerSearch'),
+    Output('player-dropdown', 'options'),
+    [Input('player-dropdown', 'search_value'),
+     Input('team-dropdown', 'value')])
 
-    if trigger_id == 'team-dropdown' and team_value:
-        team_id = internal_team_id().get(team_value)
-        if team_id:
-            return f"/team/{team_id}"
 
-    if trigger_id == 'player-dropdown' and player_value:
-        filtered = lineups[lineups['player_name'] == player_value]
-        if not filtered.empty:
-            player_id = filtered.iloc[0]['player_id']
-            return f"/player/{player_id}"
+app.clientside_callback(
+    ClientsideFunction(namespace='navigation', function_name='dropdown'),
+    Output('url-dropdown', 'pathname'),
+    [Input('team-dropdown', 'value'),
+     Input('player-dropdown', 'value')],
+    [State('team-ids', 'data')])
 
 
 if __name__ == "__main__":
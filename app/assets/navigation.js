@@ -0,0 +1,111 @@
+// nawigacja po kliknięciu w tabelę lub wybraniu z listy, liczona w
+// przeglądarce; słownik nazwa drużyny -> id jest w magazynie team-ids
+// (app/app.py), a wartością listy zawodników jest już player_id
+const SEARCH_DEBOUNCE_MS = 250;
+const SEARCH_LIMIT = 30;
+let searchRequest = 0;
+
+function dashPrefix() {
+    const config = document.getElementById('_dash-config');
+    return config ? JSON.parse(config.textContent).requests_pathname_prefix : '/';
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    navigation: {
+        // zapytanie do /api/players dopiero po chwili bez pisania; starsze
+        // odpowiedzi są odrzucane
+        playerSearch: function(searchValue, teamValue) {
+            const noUpdate = window.dash_clientside.no_update;
+            if (!searchValue && !teamValue) {
+                return noUpdate;
+            }
+            const request = ++searchRequest;
+            return new Promise(function(resolve) {
+                setTimeout(resolve, SEARCH_DEBOUNCE_MS);
+            }).then(function() {
+                if (request !== searchRequest) {
+                    return noUpdate;
+                }
+                const params = new URLSearchParams({
+                    q: searchValue || '',
+                    limit: SEARCH_LIMIT
+                });
+                if (teamValue) {
+                    params.set('team', teamValue);
+                }
+                return fetch(dashPrefix() + 'api/players?' + params)
+                    .then(function(response) { return response.json(); })
+                    .then(function(players) {
+                        if (request !== searchRequest) {
+                            return noUpdate;
+                        }
+                        // search: lista filtruje opcje sama, a serwer
+                        // dopasował już bez akcentów ("Atletico")
+                        return players.map(function(player) {
+                            return {
+                                label: player.player_name,
+                                value: player.player_id,
+                                search: (searchValue || '') + ' ' + player.player_name
+                            };
+                        });
+                    })
+                    .catch(function() { return noUpdate; });
+            });
+        },
+
+        dropdown: function(teamValue, playerValue, teamIds) {
+            const ctx = window.dash_clientside.callback_context;
+            if (!ctx.triggered.length) {
+                return window.dash_clientside.no_update;
+            }
+            const trigger = ctx.triggered[0].prop_id.split('.')[0];
+            if (trigger === 'team-dropdown' && teamValue && teamIds[teamValue]) {
+                return '/team/' + teamIds[teamValue];
+            }
+            if (trigger === 'player-dropdown' && playerValue !== null &&
+                playerValue !== undefined) {
+                return '/player/' + playerValue;
+            }
+            return window.dash_clientside.no_update;
+        },
+
+        leagueTeam: function(activeCell, records, teamIds) {
+            if (!activeCell || !records || !records[activeCell.row]) {
+                return window.dash_clientside.no_update;
+            }
+            const teamId = teamIds[records[activeCell.row]['Team']];
+            return teamId ? '/team/' + teamId : window.dash_clientside.no_update;
+        },
+
+        matchesRow: function(activeCell, records, teamIds) {
+            if (!activeCell || !records || !records[activeCell.row]) {
+                return window.dash_clientside.no_update;
+            }
+            const row = records[activeCell.row];
+            if (activeCell.column_id === 'Score') {
+                return '/match/' + row['match_id'];
+            }
+            if (activeCell.column_id === 'Home' || activeCell.column_id === 'Away') {
+                const teamId = teamIds[row[activeCell.column_id]];
+                if (teamId) {
+                    return '/team/' + teamId;
+                }
+            }
+            return window.dash_clientside.no_update;
+        },
+
+        teamPlayer: function(activeCell, records) {
+            if (!activeCell || !records || !records[activeCell.row]) {
+                return window.dash_clientside.no_update;
+            }
+            return '/player/' + records[activeCell.row]['player_id'];
+        },
+
+        teamMatch: function(activeCell, records) {
+            if (!activeCell || !records || !records[activeCell.row]) {
+                return window.dash_clientside.no_update;
+            }
+            return '/match/' + records[activeCell.row]['match_id'];
+        }
+    }
+});
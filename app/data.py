@@ -0,0 +1,516 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+from pymongo import MongoClient
+
+from utils import (CATEGORY, FLOAT, HEATMAP_SHAPE, INT, STRING,
+                   apply_nicknames, load_columns, nickname_maps,
+                   results_summary, stored_data_version, team_results,
+                   with_dtypes)
+#z katalogu głównego, ścieżkę dodaje utils
+import analytics
+import season_store
+
+MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017/")
+DB_NAME = "football_data"
+MAX_POOL_SIZE = 50
+#jak często sprawdzać, czy ingest podbił wersję danych
+VERSION_CHECK_SECONDS = 30
+#"duckdb": zestawienia całej ligi jako SQL po eksporcie Parquet (analytics.py)
+ANALYTICS_BACKEND = os.environ.get("ANALYTICS_BACKEND", "mongo")
+
+MATCH_COLUMNS = [
+    'match_id', 'match_date', 'match_week', 'home_team', 'away_team',
+    'home_score', 'away_score'
+]
+#kolumny zdarzeń wczytywane dla poszczególnych widoków (load_columns)
+PLAYER_EVENTS = {
+    'type': CATEGORY,
+    'x': FLOAT,
+    'y': FLOAT,
+    'shot_outcome': CATEGORY
+}
+TEAM_EVENTS = {
+    'id': STRING,
+    'match_id': INT,
+    'type': CATEGORY,
+    'team': CATEGORY,
+    'player_id': FLOAT,
+    'player': CATEGORY,
+    'x': FLOAT,
+    'y': FLOAT,
+    'shot_outcome': CATEGORY,
+    'shot_type': CATEGORY,
+    'shot_key_pass_id': STRING
+}
+GOAL_EVENTS = {
+    'match_id': INT,
+    'type': CATEGORY,
+    'team': CATEGORY,
+    'player_id': FLOAT,
+    'player': CATEGORY,
+    'shot_outcome': CATEGORY,
+    'shot_type': CATEGORY,
+    'shot_key_pass_id': STRING
+}
+
+_client = None
+_client_pid = None
+_lock = threading.RLock()
+_caches = []
+_version = None
+_version_checked = 0.0
+
+
+def get_db():
+    #jeden klient na proces; po forku (np. gunicorn) tworzony jest nowy
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _lock:
+            if _client is None or _client_pid != pid:
+                _client = MongoClient(MONGO_URI, maxPoolSize=MAX_POOL_SIZE)
+                _client_pid = pid
+    return _client[DB_NAME]
+
+
+def before_fork():
+    #klient Mongo i połączenie DuckDB mają własne wątki, więc nie mogą przejść
+    #przez fork; procesy robocze otwierają je od nowa (get_db, get_analytics)
+    global _client, _client_pid
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _client_pid = None
+        _analytics.close()
+
+
+def data_version():
+    global _version, _version_checked
+    now = time.monotonic()
+    if _version is None or now - _version_checked > VERSION_CHECK_SECONDS:
+        version = stored_data_version(get_db())
+        with _lock:
+            if version != _version:
+                for cache in _caches:
+                    cache.clear()
+                _version = version
+            _version_checked = now
+    return _version
+
+
+class VersionedFiles:
+    #pliki zapisywane po ingeście (migawka, Parquet) z wersją danych, z
+    #której powstały; używane tylko przy zgodnej wersji, a brakujące
+    #sprawdzane co VERSION_CHECK_SECONDS, bo powstają po podbiciu wersji
+    def __init__(self, opener):
+        self.opener = opener
+        self.value = None
+        self.checked = 0.0
+
+    def get(self):
+        version = data_version()
+        now = time.monotonic()
+        if self.value is not None and self.value.version == version:
+            return self.value
+        if self.value is not None or now - self.checked > VERSION_CHECK_SECONDS:
+            with _lock:
+                self.value = self.opener(version)
+                self.checked = now
+        return self.value
+
+    def close(self):
+        #otwierane ponownie przy następnym get(), np. w procesie roboczym
+        close = getattr(self.value, 'close', None)
+        if close is not None:
+            close()
+        self.value = None
+        self.checked = 0.0
+
+
+_store = VersionedFiles(
+    lambda version: season_store.open_store(season_store.STORE_DIR, version))
+_analytics = VersionedFiles(
+    lambda version: analytics.open_analytics(analytics.PARQUET_DIR, version))
+
+
+def get_season_store():
+    #migawka sezonu (season_store.py) zgodna z bieżącą wersją danych albo
+    #None; pliki są mapowane w pamięć, więc procesy dzielą jedną kopię
+    return _store.get()
+
+
+def get_analytics():
+    #zapytania DuckDB po plikach Parquet (analytics.py) albo None przy
+    #backendzie mongo, bez duckdb lub bez aktualnego eksportu
+    if ANALYTICS_BACKEND != "duckdb":
+        return None
+    return _analytics.get()
+
+
+def memoized(maxsize):
+    #pamięć podręczna LRU wspólna dla wszystkich stron, czyszczona przy
+    #zmianie wersji danych
+    def decorator(func):
+        cache = OrderedDict()
+        _caches.append(cache)
+
+        @wraps(func)
+        def wrapper(*args):
+            data_version()
+            with _lock:
+                if args in cache:
+                    cache.move_to_end(args)
+                    return cache[args]
+            value = func(*args)
+            with _lock:
+                cache[args] = value
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+@memoized(maxsize=1)
+def display_names_stored():
+    #ingest z --display-names zapisał już ksywki, nie trzeba ich nadawać
+    doc = get_db().meta.find_one({'_id': 'display_names'}) or {}
+    return doc.get('applied', False)
+
+
+@memoized(maxsize=1)
+def get_name_maps():
+    lineups = pd.DataFrame(
+        list(get_db().lineups.find({'player_nickname': {
+            '$ne': None
+        }}, {
+            '_id': 0,
+            'player_id': 1,
+            'player_name': 1,
+            'player_nickname': 1
+        })))
+    return nickname_maps(lineups)
+
+
+def with_display_names(events=None, lineups=None):
+    #nazwy zamieniane raz, przy wczytaniu do pamięci podręcznej
+    if not display_names_stored():
+        apply_nicknames(events=events, lineups=lineups, maps=get_name_maps())
+
+
+@memoized(maxsize=1)
+def get_matches() -> pd.DataFrame:
+    #wspólna ramka tylko do odczytu; przy pustej kolekcji same kolumny, z
+    #których korzystają team_results i tabela ligi
+    matches = pd.DataFrame(list(get_db().matches.find()))
+    return matches if len(matches) else pd.DataFrame(columns=MATCH_COLUMNS)
+
+
+@memoized(maxsize=1)
+def get_lineups() -> pd.DataFrame:
+    #składy całego sezonu z ksywkami zamiast pełnych nazwisk, tylko do odczytu
+    lineups = pd.DataFrame(list(get_db().lineups.find()))
+    with_display_names(lineups=lineups)
+    return lineups
+
+
+@memoized(maxsize=1)
+def get_player_directory() -> pd.DataFrame:
+    #zawodnicy z drużynami, z pełnym nazwiskiem i ksywką (do wyszukiwarki)
+    players = pd.DataFrame(
+        list(get_db().lineups.find({}, {
+            '_id': 0,
+            'player_id': 1,
+            'player_name': 1,
+            'player_nickname': 1,
+            'team': 1
+        })),
+        columns=['player_id', 'player_name', 'player_nickname', 'team'])
+    return players.drop_duplicates().reset_index(drop=True)
+
+
+@memoized(maxsize=1)
+def get_results() -> pd.DataFrame:
+    #wyniki całej ligi, jeden wiersz na drużynę w meczu
+    source = get_analytics()
+    if source is not None:
+        return source.team_results()
+    return team_results(get_matches())
+
+
+@memoized(maxsize=1)
+def get_results_summary() -> pd.DataFrame:
+    return results_summary(get_results())
+
+
+def get_team_results(team_name) -> pd.DataFrame:
+    results = get_results()
+    return results[results['team'] == team_name]
+
+
+def get_match(match_id) -> pd.Series:
+    matches = get_matches()
+    return matches[matches['match_id'] == int(match_id)].iloc[0]
+
+
+@memoized(maxsize=32)
+def _match_events(match_id):
+    events = pd.DataFrame(list(get_db().events.find({'match_id': match_id})))
+    with_display_names(events=events)
+    return events
+
+
+@memoized(maxsize=32)
+def _match_lineups(match_id):
+    lineups = pd.DataFrame(list(get_db().lineups.find({'match_id': match_id})))
+    with_display_names(lineups=lineups)
+    return lineups
+
+
+class MatchBundle:
+    #wszystko, czego potrzebuje strona meczu, wczytane raz; ramki są
+    #współdzielone między widokami, więc nie wolno ich modyfikować
+    def __init__(self, match_id):
+        self.match_id = int(match_id)
+        self.match = get_match(self.match_id)
+        self.home_team = self.match['home_team']
+        self.away_team = self.match['away_team']
+        self.events = _match_events(self.match_id)
+        self.lineups = _match_lineups(self.match_id)
+        self.name_maps = get_name_maps()
+
+        events = self.events
+        self.starting_xi = events[events['type'] == 'Starting XI']
+        self.shots = events[events['type'] == 'Shot']
+        self.goals = pd.concat([
+            self.shots[self.shots['shot_outcome'] == 'Goal'],
+            events[events['type'] == 'Own Goal For']
+        ],
+                               ignore_index=True)
+        self.completed_passes = events[(events['type'] == 'Pass')
+                                       & events['pass_outcome'].isnull()]
+        self.substitutions = events[events['type'] == 'Substitution']
+        self.cards = self._cards()
+
+    def _cards(self):
+        lineups = self.lineups
+        cards = []
+        for team_name in lineups['team'].unique():
+            team_players = lineups[lineups['team'] == team_name]
+            for player_name, player_cards in zip(team_players['player_name'],
+                                                 team_players['cards']):
+                if isinstance(player_cards, str) and player_cards.startswith("["):
+                    player_cards = json.loads(player_cards.replace("'", '"'))
+                for card in player_cards if isinstance(player_cards,
+                                                       list) else []:
+                    cards.append({
+                        'team': team_name,
+                        'player_name': player_name,
+                        'card_type': card.get('card_type'),
+                        'time': card.get('time', '0:0')
+                    })
+        return pd.DataFrame(cards,
+                            columns=['team', 'player_name', 'card_type', 'time'])
+
+
+@memoized(maxsize=32)
+def _match_bundle(match_id):
+    return MatchBundle(match_id)
+
+
+@memoized(maxsize=32)
+def _pass_networks(match_id):
+    networks = {}
+    for doc in get_db().pass_networks.find({'match_id': match_id}):
+        nodes = pd.DataFrame(doc['nodes'],
+                             columns=['player_id', 'player', 'x', 'y', 'passes'])
+        edges = pd.DataFrame(doc['edges'],
+                             columns=['player_id', 'pass_recipient_id', 'count'])
+        with_display_names(events=nodes)
+        networks[doc['team']] = (nodes, edges)
+    return networks
+
+
+def get_pass_network(match_id, team_name):
+    #(węzły, krawędzie) z pass_networks (derived.py) albo None, gdy kolekcja
+    #nie została jeszcze zbudowana; ramki tylko do odczytu
+    return _pass_networks(int(match_id)).get(team_name)
+
+
+def get_match_bundle(match_id) -> MatchBundle:
+    return _match_bundle(int(match_id))
+
+
+@memoized(maxsize=4)
+def _team_events(team_name):
+    matches = get_matches()
+    match_ids = matches[(matches['home_team'] == team_name) |
+                        (matches['away_team'] == team_name)]['match_id']
+    store = get_season_store()
+    if store is not None:
+        events = store.match_events(match_ids.tolist(), TEAM_EVENTS)
+    else:
+        events = load_columns(get_db().events,
+                              {"match_id": {
+                                  "$in": match_ids.tolist()
+                              }}, TEAM_EVENTS)
+    with_display_names(events=events)
+    return with_dtypes(events, TEAM_EVENTS)
+
+
+def get_team_events(team_name) -> pd.DataFrame:
+    return _team_events(team_name).copy()
+
+
+@memoized(maxsize=64)
+def _player_events(player_id):
+    store = get_season_store()
+    if store is not None:
+        events = store.player_events(player_id, PLAYER_EVENTS)
+        return events[events['x'].notna()].reset_index(drop=True)
+    return load_columns(get_db().events, {
+        'player_id': player_id,
+        'x': {
+            '$exists': True
+        }
+    }, PLAYER_EVENTS)
+
+
+def get_player_events(player_id) -> pd.DataFrame:
+    return _player_events(int(player_id)).copy()
+
+
+@memoized(maxsize=64)
+def _player_shots(player_id):
+    store = get_season_store()
+    if store is not None:
+        events = store.player_events(player_id, PLAYER_EVENTS)
+        return events[events['type'] == 'Shot'].reset_index(drop=True)
+    return load_columns(get_db().events, {
+        'player_id': player_id,
+        'type': 'Shot'
+    }, PLAYER_EVENTS)
+
+
+def get_player_shots(player_id) -> pd.DataFrame:
+    return _player_shots(int(player_id)).copy()
+
+
+def decode_heatmap(doc):
+    return np.frombuffer(doc['grid'], dtype='<f2').reshape(
+        doc['shape']).astype(float)
+
+
+def decode_counts(doc):
+    #surowe zliczenia meczu z niezerowych pól zapisanych przez derived.py
+    counts = np.zeros(doc['shape'], dtype=np.int64)
+    cells = np.frombuffer(doc['cells'], dtype='<u2')
+    counts.flat[cells] = np.frombuffer(doc['counts'], dtype='<u4')
+    return counts
+
+
+@memoized(maxsize=1)
+def _heatmaps_built():
+    return get_db().player_heatmaps.find_one({}, {'_id': 1}) is not None
+
+
+@memoized(maxsize=64)
+def _player_heatmap(player_id, match_ids):
+    #siatka z player_heatmaps (derived.py) przeskalowana jak w draw_map:
+    #przez maksimum surowych zliczeń sezonu albo sumy wybranych meczów, więc
+    #te same zdarzenia mają tę samą skalę; zera dla zawodnika bez zdarzeń
+    collection = get_db().player_heatmaps
+    if not _heatmaps_built():
+        return None
+    if match_ids is None:
+        doc = collection.find_one({'player_id': player_id, 'match_id': None})
+        if doc is None:
+            return np.zeros(HEATMAP_SHAPE)
+        grid = decode_heatmap(doc)
+        return grid / doc['peak'] if doc['peak'] > 0 else grid
+    docs = list(
+        collection.find({
+            'player_id': player_id,
+            'match_id': {
+                '$in': list(match_ids)
+            }
+        }))
+    if not docs:
+        return np.zeros(HEATMAP_SHAPE)
+    if any('cells' not in doc for doc in docs):
+        #kolekcja sprzed zapisu zliczeń, do odbudowania przez derived.py
+        return None
+    grid = sum(decode_heatmap(doc) for doc in docs)
+    peak = sum(decode_counts(doc) for doc in docs).max()
+    return grid / peak if peak > 0 else grid
+
+
+def get_player_heatmap(player_id, match_ids=None):
+    #None, gdy kolekcja pochodna nie została jeszcze zbudowana
+    if match_ids is not None:
+        match_ids = tuple(sorted(int(match_id) for match_id in match_ids))
+    grid = _player_heatmap(int(player_id), match_ids)
+    return None if grid is None else grid.copy()
+
+
+@memoized(maxsize=1)
+def get_goals() -> pd.DataFrame:
+    #gole z gry i samobójcze (te drugie nie są strzałami)
+    goals = load_columns(
+        get_db().events, {
+            "$or": [{
+                "type": "Shot",
+                "shot_outcome": "Goal"
+            }, {
+                "type": "Own Goal For"
+            }]
+        }, GOAL_EVENTS)
+    shots_first = np.argsort(goals['type'] != 'Shot', kind='stable')
+    return goals.iloc[shots_first].reset_index(drop=True)
+
+
+@memoized(maxsize=32)
+def get_team_match_stats(match_id) -> dict:
+    return {
+        doc['team']: doc
+        for doc in get_db().team_match_stats.find({'match_id': int(match_id)},
+                                                  {'_id': 0})
+    }
+
+
+@memoized(maxsize=20)
+def get_team_season_stats(team_name) -> pd.DataFrame:
+    return pd.DataFrame(
+        list(get_db().team_match_stats.find({'team': team_name},
+                                            {'_id': 0})))
+
+
+@memoized(maxsize=256)
+def get_player_season_stats(player_id) -> dict:
+    return get_db().player_season_stats.find_one({'player_id': int(player_id)},
+                                                 {'_id': 0})
+
+
+def preload():
+    #niezmienne dane sezonu wspólne dla stron, wczytywane w procesie głównym
+    #serwera (wsgi.py), żeby procesy robocze dzieliły je przez copy-on-write
+    display_names_stored()
+    get_name_maps()
+    get_matches()
+    get_lineups()
+    get_player_directory()
+    get_results()
+    get_results_summary()
+    get_goals()
+    get_season_store()
@@ -0,0 +1,87 @@
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import data
+
+#pusty FIGURE_CACHE_DIR wyłącza zapis na dysk
+CACHE_DIR = os.environ.get("FIGURE_CACHE_DIR", "figure_cache")
+MAX_ENTRIES = 64
+
+
+def figure_json(fig):
+    #gotowy do dcc.Graph słownik, bez ponownej walidacji przez plotly
+    return json.loads(fig.to_json())
+
+
+def table_json(df):
+    return {'columns': list(df.columns), 'records': df.to_dict('records')}
+
+
+class FigureCache:
+    #wyrenderowane figury i tabele stron; klucz (strona, id, wersja danych),
+    #więc po nowym ingeście stare wpisy przestają być trafiane
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=MAX_ENTRIES):
+        self.root = Path(cache_dir) if cache_dir else None
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.pruned = set()
+
+    def path(self, page, key, version):
+        return self.root / page / str(version) / f"{key}.json"
+
+    def write_atomic(self, path, value):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{id(value)}.tmp")
+        tmp.write_text(json.dumps(value, default=str))
+        os.replace(tmp, path)
+
+    def prune(self, page, version):
+        #katalogi starszych wersji danych danej strony
+        if (page, version) in self.pruned:
+            return
+        self.pruned.add((page, version))
+        page_dir = self.root / page
+        if page_dir.exists():
+            for old in page_dir.iterdir():
+                if old.is_dir() and old.name != str(version):
+                    shutil.rmtree(old, ignore_errors=True)
+
+    def remember(self, cache_key, value):
+        with self.lock:
+            self.memory[cache_key] = value
+            self.memory.move_to_end(cache_key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+
+    def get(self, page, key, build):
+        version = data.data_version()
+        cache_key = (page, str(key), version)
+        with self.lock:
+            if cache_key in self.memory:
+                self.memory.move_to_end(cache_key)
+                return self.memory[cache_key]
+
+        path = self.path(page, key, version) if self.root else None
+        if path is not None and path.exists():
+            try:
+                value = json.loads(path.read_text())
+            except ValueError:
+                value = None
+            if value is not None:
+                self.remember(cache_key, value)
+                return value
+
+        value = build()
+        self.remember(cache_key, value)
+        if path is not None:
+            self.prune(page, version)
+            self.write_atomic(path, value)
+        return value
+
+
+cache = FigureCache()
@@ -0,0 +1,21 @@
+import gc
+import multiprocessing
+import os
+
+#gunicorn -c gunicorn.conf.py wsgi:application; liczba procesów i wątków z
+#WEB_CONCURRENCY i WEB_THREADS, adres z BIND (jak w wsgi.py)
+bind = os.environ.get("BIND", "0.0.0.0:8050")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.environ.get("WEB_THREADS", 4))
+worker_class = "gthread"
+#aplikacja wczytana w procesie głównym, procesy robocze dzielą jej pamięć
+preload_app = True
+timeout = 120
+
+
+def when_ready(server):
+    #po wczytaniu aplikacji, przed forkiem procesów roboczych; gc.freeze
+    #wyłącza wspólne obiekty z odśmiecania, które zapisywałoby ich strony
+    import data
+    data.before_fork()
+    gc.freeze()
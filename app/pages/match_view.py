@@ -1,31 +1,17 @@
 import dash
-from dash import Input, Output, callback, html, dash_table, dcc
-from pymongo import MongoClient
+from dash import Input, Output, State, callback, html, dash_table, dcc
+import numpy as np
 import pandas as pd
-import json
 import plotly.graph_objects as go
 from plotly_football_pitch import make_pitch_figure, PitchDimensions, SingleColourBackground
+import data
 import utils
+from figure_cache import cache, figure_json, table_json
 
 dash.register_page(__name__, path_template="/match/<match_id>")
 
-client = MongoClient("mongodb://localhost:27017/")
-db = client["football_data"]
 
-matches_df = pd.DataFrame(list(db.matches.find()))
-lineups = pd.DataFrame(list(db.lineups.find()))
-lineups = utils.apply_nicknames(lineups=lineups)
-players_df = sorted(lineups["player_name"].dropna().unique())
-
-
-def get_match_data(match_id):
-    match_id = int(match_id)
-    events = pd.DataFrame(list(db.events.find({'match_id': match_id})))
-    lineups = pd.DataFrame(list(db.lineups.find({'match_id': match_id})))
-    return events, lineups
-
-
-def generate_timeline(match_id):
+def generate_timeline(bundle):
     icons = {
         "Yellow Card": "🟨",
         "Second Yellow": "🟨🟥",
@@ -40,29 +26,19 @@ def generate_timeline(match_id):
         "Substitution": "🔁"
     }
 
-    events, lineups = get_match_data(match_id)
-    events, lineups = utils.apply_nicknames(events, lineups)
-    events['minute'] += 1
-
     timeline = []
 
     #gole, asysty
-    normal_goals = events[(events['type'] == 'Shot')
-                          & (events['shot_outcome'] == 'Goal')].copy()
-    own_goals = events[events['type'] == 'Own Goal For'].copy()
-    goals = pd.concat([normal_goals, own_goals], ignore_index=True)
+    goals = bundle.goals
+    assistants = utils.resolve_assists(goals, bundle.events)['player']
 
-    passes = events[events['type'] == 'Pass'][['id', 'player']]
-    assist_map = dict(zip(passes['id'], passes['player']))
-
-    for _, row in goals.iterrows():
-        minute = row['minute']
+    for idx, row in goals.iterrows():
+        minute = row['minute'] + 1
         team = row.get('team')
         player = row.get('player')
 
         if row['type'] == 'Shot':
-            assist_id = row.get('shot_key_pass_id')
-            assistant = assist_map.get(assist_id)
+            assistant = assistants.get(idx)
             player_str = f"{player} (a. {assistant})" if assistant else player
             event_type = 'Goal (Pen)' if row.get(
                 'shot_type') == 'Penalty' else 'Goal'
@@ -79,40 +55,26 @@ def generate_timeline(match_id):
         })
 
     #kartki
-    lineups['cards'] = lineups['cards'].apply(
-        lambda x: json.loads(x.replace("'", '"'))
-        if isinstance(x, str) and x.startswith("[") else x)
-
-    for team_name in lineups['team'].unique():
-        team_players = lineups[lineups['team'] == team_name]
-        for _, player in team_players.iterrows():
-            for card in player.get("cards", []):
-                card_type = card.get("card_type")
-                time_str = card.get("time", "0:0")
-                try:
-                    minute, _ = map(int, time_str.split(":"))
-                except:
-                    minute = 0
+    for _, card in bundle.cards.iterrows():
+        card_type = card['card_type']
+        try:
+            minute, _ = map(int, card['time'].split(":"))
+        except:
+            minute = 0
 
-                timeline.append({
-                    'icon':
-                    icons.get(card_type),
-                    'minute':
-                    minute + 1,
-                    'team':
-                    team_name,
-                    'player':
-                    player.get("player_name", "Brak danych"),
-                    'type':
-                    card_type
-                })
+        timeline.append({
+            'icon': icons.get(card_type),
+            'minute': minute + 1,
+            'team': card['team'],
+            'player': card['player_name'],
+            'type': card_type
+        })
 
     #zmiany
-    subs = events[events['type'] == 'Substitution'].copy()
-    for _, row in subs.iterrows():
+    for _, row in bundle.substitutions.iterrows():
         timeline.append({
             'icon': icons['Substitution'],
-            'minute': row['minute'],
+            'minute': row['minute'] + 1,
             'team': row.get('team'),
             'player':
             f"⬇️ {row.get('player')} ⬆️ {row.get('substitution_replacement')}",
@@ -120,13 +82,14 @@ def generate_timeline(match_id):
         })
 
     #połowy i doliczony czas
+    events = bundle.events
     half_ends = (events[events['type'] == 'Half End'].sort_values(
         ['period', 'minute', 'second']).drop_duplicates(subset='period',
                                                         keep='last'))
 
     for _, row in half_ends.iterrows():
         period = row.get("period")
-        minute = row.get("minute", 0)
+        minute = row.get("minute", 0) + 1
 
         if period == 1:
             if minute > 45:
@@ -167,20 +130,14 @@ def generate_timeline(match_id):
     return timeline_df[['icon', 'minute', 'type', 'team', 'player']]
 
 
-def draw_lineup_plot(match_id):
-    events, lineups = get_match_data(match_id)
-    starting_events = events[events['type'] == 'Starting XI'].copy()
-    events, lineups = utils.apply_nicknames(events, lineups, starting_events)
-
-    match = matches_df[matches_df["match_id"] == match_id].iloc[0]
-    home_team = match['home_team']
-    away_team = match['away_team']
+def draw_lineup_plot(bundle):
+    home_team, away_team = bundle.home_team, bundle.away_team
     position_coordinates = utils.get_coordinates()
 
     pitch_length, pitch_width = 120, 80
     players = []
 
-    for _, row in starting_events.iterrows():
+    for _, row in bundle.starting_xi.iterrows():
         team = row['team']
         for player in row['tactics']['lineup']:
             name = player['player']['name']
@@ -226,95 +183,60 @@ def draw_lineup_plot(match_id):
     return fig
 
 
-def generate_match_stats(events, lineups, match, home_team, away_team):
+def generate_match_stats(bundle):
+    match = bundle.match
+    home_team, away_team = bundle.home_team, bundle.away_team
+    team_stats = data.get_team_match_stats(bundle.match_id)
+    home_stats = team_stats.get(home_team, {})
+    away_stats = team_stats.get(away_team, {})
 
-    def count_shots(df):
-        return len(df[df['type'] == 'Shot'])
+    def stat(stats, name):
+        return stats.get(name, 0)
 
-    def count_shots_on_target(df):
-        return len(df[(df['type'] == 'Shot')
-                      & (df['shot_outcome'].isin(['Goal', 'Saved']))])
-
-    def sum_xg(df):
-        return df[df['type'] == 'Shot']['shot_statsbomb_xg'].sum()
-
-    def count_passes(df):
-        return df[df['type'] == 'Pass']
-
-    def count_accurate_passes(df):
-        passes = count_passes(df)
-        return len(passes[passes['pass_outcome'].isnull()])
-
-    def pass_accuracy_pct(df):
-        passes = count_passes(df)
-        total = len(passes)
-        accurate = count_accurate_passes(df)
+    def pass_accuracy_pct(stats):
+        total = stat(stats, 'passes')
+        accurate = stat(stats, 'passes_completed')
         return f"{(accurate / total) * 100:.1f}%" if total > 0 else "0.0%"
 
-    def count_corners(df):
-        return len(df[df['pass_type'] == 'Corner'])
-
-    def count_penalties(df):
-        return len(df[df['shot_type'] == 'Penalty'])
-
-    def count_free_kicks(df):
-        return len(df[df['pass_type'] == 'Free Kick'])
-
-    lineups_dict = {
-        team: group.to_dict(orient="records")
-        for team, group in lineups.groupby("team")
-    }
-
-    def count_yellow_cards(team):
-        return sum(1 for p in lineups_dict.get(team, [])
-                   for c in p.get("cards", [])
-                   if c.get("card_type") in ["Yellow Card", "Second Yellow"])
-
-    def count_red_cards(team):
-        return sum(1 for p in lineups_dict.get(team, [])
-                   for c in p.get("cards", [])
-                   if c.get("card_type") in ["Red Card", "Second Yellow"])
-
-    home_events = events[events['team'] == home_team]
-    away_events = events[events['team'] == away_team]
-
-    controlled_events = events[events['type'].isin(
-        ['Pass', 'Ball Receipt', 'Carry'])]
-    total_controlled = len(controlled_events)
-    home_possession = f"{(len(controlled_events[controlled_events['team'] == home_team]) / total_controlled) * 100:.1f}%" if total_controlled else "0.0%"
-    away_possession = f"{(len(controlled_events[controlled_events['team'] == away_team]) / total_controlled) * 100:.1f}%" if total_controlled else "0.0%"
+    def possession_pct(stats):
+        total = stat(stats, 'possession_events') + stat(
+            stats, 'opponent_possession_events')
+        return f"{(stat(stats, 'possession_events') / total) * 100:.1f}%" if total else "0.0%"
 
     stats = {
         'Goals': [match['home_score'], match['away_score']],
-        'Shots': [count_shots(home_events),
-                  count_shots(away_events)],
+        'Shots': [stat(home_stats, 'shots'),
+                  stat(away_stats, 'shots')],
         'Shots on Target': [
-            count_shots_on_target(home_events),
-            count_shots_on_target(away_events)
+            stat(home_stats, 'shots_on_target'),
+            stat(away_stats, 'shots_on_target')
         ],
-        'xG': [round(sum_xg(home_events), 2),
-               round(sum_xg(away_events), 2)],
-        'Possession': [home_possession, away_possession],
+        'xG': [
+            round(stat(home_stats, 'xg'), 2),
+            round(stat(away_stats, 'xg'), 2)
+        ],
+        'Possession': [possession_pct(home_stats),
+                       possession_pct(away_stats)],
         'Accurate Passes': [
-            count_accurate_passes(home_events),
-            count_accurate_passes(away_events)
+            stat(home_stats, 'passes_completed'),
+            stat(away_stats, 'passes_completed')
         ],
         'Pass Accuracy':
-        [pass_accuracy_pct(home_events),
-         pass_accuracy_pct(away_events)],
-        'Corners': [count_corners(home_events),
-                    count_corners(away_events)],
+        [pass_accuracy_pct(home_stats),
+         pass_accuracy_pct(away_stats)],
+        'Corners': [stat(home_stats, 'corners'),
+                    stat(away_stats, 'corners')],
         'Penalties':
-        [count_penalties(home_events),
-         count_penalties(away_events)],
+        [stat(home_stats, 'penalties'),
+         stat(away_stats, 'penalties')],
         'Free Kicks':
-        [count_free_kicks(home_events),
-         count_free_kicks(away_events)],
+        [stat(home_stats, 'free_kicks'),
+         stat(away_stats, 'free_kicks')],
         'Yellow Cards':
-        [count_yellow_cards(home_team),
-         count_yellow_cards(away_team)],
-        'Red Cards': [count_red_cards(home_team),
-                      count_red_cards(away_team)],
+        [stat(home_stats, 'yellow_cards'),
+         stat(away_stats, 'yellow_cards')],
+        'Red Cards': [stat(home_stats, 'red_cards'),
+                      stat(away_stats, 'red_cards')],
     }
 
     df = pd.DataFrame.from_dict(
@@ -325,12 +247,12 @@ def generate_match_stats(events, lineups, match, home_team, away_team):
     return df
 
 
-def get_lineup_tables(events, lineups, home_team, away_team):
-    starting_11 = events[events['type'] == 'Starting XI']
+def get_lineup_tables(bundle):
+    lineups = bundle.lineups
     starting_ids = {
         player['player']['id']
-        for _, row in starting_11.iterrows()
-        for player in row['tactics']['lineup']
+        for tactics in bundle.starting_xi['tactics']
+        for player in tactics['lineup']
     }
 
     def parse_players(team, is_sub=False):
@@ -352,23 +274,20 @@ def get_lineup_tables(events, lineups, home_team, away_team):
         return pd.DataFrame(players)
 
     return (
-        parse_players(home_team),
-        parse_players(away_team),
-        parse_players(home_team, is_sub=True),
-        parse_players(away_team, is_sub=True),
+        parse_players(bundle.home_team),
+        parse_players(bundle.away_team),
+        parse_players(bundle.home_team, is_sub=True),
+        parse_players(bundle.away_team, is_sub=True),
     )
 
 
-def draw_shot_map(events, home_team, away_team):
+def draw_shot_map(bundle):
     pitch_length, pitch_width = 120, 80
+    home_team, away_team = bundle.home_team, bundle.away_team
 
-    shots = events[(events['type'] == 'Shot')
-                   & (events['location'].notnull())].copy()
-    shots['x'] = shots['location'].apply(lambda loc: loc[0])
-    shots['y'] = shots['location'].apply(lambda loc: 80 - loc[1])
-
-    shots.loc[shots['team'] == home_team, 'x'] = pitch_length - shots['x']
-    shots.loc[shots['team'] == home_team, 'y'] = pitch_width - shots['y']
+    shots = bundle.shots[bundle.shots['x'].notnull()].copy()
+    shots['x'], shots['y'] = utils.pitch_xy(shots['x'], shots['y'],
+                                            shots['team'] == home_team)
 
     home_shots = shots[shots['team'] == home_team]
     away_shots = shots[shots['team'] == away_team]
@@ -410,87 +329,80 @@ def draw_shot_map(events, home_team, away_team):
     return fig
 
 
-def draw_pass_network(events, team_name):
-    from collections import defaultdict
-    import numpy as np
-
-    pitch_length, pitch_width = 120, 80
-
-    passes = events[(events['type'] == 'Pass')
-                    & (events['pass_outcome'].isnull()) &
-                    (events['location'].notnull()) &
-                    (events['pass_end_location'].notnull()) &
-                    (events['player'].notnull()) &
-                    (events['team'] == team_name)].copy()
+def get_pass_network(bundle, team_name):
+    network = data.get_pass_network(bundle.match_id, team_name)
+    if network is None:
+        #brak kolekcji pass_networks (derived.py nie był uruchomiony)
+        passes = bundle.completed_passes
+        network = utils.pass_network(passes[passes['team'] == team_name])
+    return network
 
-    if passes.empty:
-        return html.Div(f"No pass data available for {team_name}")
 
-    #średnie pozycje
-    player_locs = defaultdict(lambda: [[], []])
-    for _, row in passes.iterrows():
-        player = row['player']
-        x, y = row['location']
-        player_locs[player][0].append(x)
-        player_locs[player][1].append(80 - y)
-
-    avg_pos = {
-        p: (np.mean(xs), np.mean(ys))
-        for p, (xs, ys) in player_locs.items()
-    }
+def draw_pass_network(bundle, team_name):
+    pitch_length, pitch_width = 120, 80
 
-    #pary zawodników
-    ocmbinations = passes.groupby(['player', 'pass_recipient'
-                                   ]).size().reset_index(name='count')
+    nodes, edges = get_pass_network(bundle, team_name)
+    if nodes.empty:
+        return None
 
     fig = make_pitch_figure(
         PitchDimensions(pitch_width, pitch_length),
         pitch_background=SingleColourBackground("darkslategrey"))
 
-    #linie
-    for _, row in ocmbinations.iterrows():
-        p1, p2, count = row['player'], row['pass_recipient'], row['count']
-        if p1 in avg_pos and p2 in avg_pos:
-            x0, y0 = avg_pos[p1]
-            x1, y1 = avg_pos[p2]
-            fig.add_shape(type="line",
-                          x0=x0,
-                          y0=y0,
-                          x1=x1,
-                          y1=y1,
-                          line=dict(width=min(count, 6), color="skyblue"),
-                          opacity=0.5)
-
-    #zawodnicy
-    for player, (x, y) in avg_pos.items():
+    #linie: jeden ślad na grubość (1-6), odcinki rozdzielone None
+    positions = nodes.set_index('player_id')[['x', 'y']]
+    edges = edges.join(positions, on='player_id').join(positions,
+                                                       on='pass_recipient_id',
+                                                       rsuffix='_end')
+    edges['width'] = edges['count'].clip(upper=6)
+    for width, group in edges.groupby('width'):
+        gaps = np.full(len(group), None)
         fig.add_trace(
-            go.Scatter(x=[x],
-                       y=[y],
-                       mode="markers+text",
-                       text=[player.split()[-1]],
-                       textposition="top center",
-                       marker=dict(size=14,
-                                   color="blue",
-                                   line=dict(color="white", width=2)),
-                       textfont=dict(color="white", size=10),
-                       hoverinfo="text",
-                       hovertext=[player],
+            go.Scatter(x=np.column_stack([group['x'], group['x_end'],
+                                          gaps]).ravel(),
+                       y=np.column_stack([group['y'], group['y_end'],
+                                          gaps]).ravel(),
+                       mode="lines",
+                       line=dict(width=int(width), color="skyblue"),
+                       opacity=0.5,
+                       hoverinfo="skip",
                        showlegend=False))
 
+    #zawodnicy
+    fig.add_trace(
+        go.Scatter(x=nodes['x'],
+                   y=nodes['y'],
+                   mode="markers+text",
+                   text=nodes['player'].str.split().str[-1],
+                   textposition="top center",
+                   marker=dict(size=14,
+                               color="blue",
+                               line=dict(color="white", width=2)),
+                   textfont=dict(color="white", size=10),
+                   hoverinfo="text",
+                   hovertext=nodes['player'],
+                   showlegend=False))
+
     fig.update_layout(paper_bgcolor='#0a1128',
                       height=500,
                       width=750,
                       margin=dict(l=20, r=20, t=40, b=20))
 
-    return html.Div(dcc.Graph(figure=fig, config={"displayModeBar": False}),
+    return fig
+
+
+def pass_network_view(figure, team_name):
+    if figure is None:
+        return html.Div(f"No pass data available for {team_name}")
+    return html.Div(dcc.Graph(figure=figure, config={"displayModeBar": False}),
                     style={"textAlign": "center"})
 
 
-def draw_xg_timeline(events, home_team, away_team):
+def draw_xg_timeline(bundle):
+    home_team, away_team = bundle.home_team, bundle.away_team
 
-    shots = events[(events['type'] == 'Shot')
-                   & (events['shot_statsbomb_xg'].notnull()) &
-                   (events['team'].notnull())].copy()
+    shots = bundle.shots[(bundle.shots['shot_statsbomb_xg'].notnull()) &
+                         (bundle.shots['team'].notnull())].copy()
 
     home_xg = shots[shots['team'] == home_team].copy()
     away_xg = shots[shots['team'] == away_team].copy()
@@ -559,47 +471,335 @@ def draw_xg_timeline(events, home_team, away_team):
     return fig
 
 
+def render_lineups(bundle):
+    home_df, away_df, subs_home, subs_away = get_lineup_tables(bundle)
+    return {
+        'lineup_plot': figure_json(draw_lineup_plot(bundle)),
+        'home_lineup': table_json(home_df),
+        'away_lineup': table_json(away_df),
+        'home_bench': table_json(subs_home),
+        'away_bench': table_json(subs_away),
+    }
+
+
+def render_events(bundle):
+    return {
+        'timeline': table_json(generate_timeline(bundle)),
+        'shot_map': figure_json(draw_shot_map(bundle)),
+    }
+
+
+def render_stats(bundle):
+    return {'stats': table_json(generate_match_stats(bundle))}
+
+
+def render_networks(bundle):
+    views = {
+        'home_team': bundle.home_team,
+        'away_team': bundle.away_team
+    }
+    for side, team in [('home', bundle.home_team), ('away', bundle.away_team)]:
+        fig = draw_pass_network(bundle, team)
+        views[f'{side}_network'] = figure_json(fig) if fig is not None else None
+    return views
+
+
+def render_momentum(bundle):
+    return {'xg_timeline': figure_json(draw_xg_timeline(bundle))}
+
+
+#zakładki strony meczu: (klucz, etykieta, funkcja licząca JSON sekcji)
+SECTIONS = [
+    ('lineups', "Lineups", render_lineups),
+    ('events', "Timeline & Shots", render_events),
+    ('stats', "Statistics", render_stats),
+    ('networks', "Passing networks", render_networks),
+    ('momentum', "Match momentum", render_momentum),
+]
+RENDERERS = {key: render for key, _, render in SECTIONS}
+
+
+def render_match(match_id, section):
+    #jedna sekcja strony meczu w postaci JSON, do figure_cache
+    return RENDERERS[section](data.get_match_bundle(match_id))
+
+
 def link_team(team_name):
     ids = utils.internal_team_id()
     return dcc.Link(team_name, href=f"/team/{ids[team_name]}")
 
 
-def layout(match_id=None):
+CELL_STYLE = {
+    'backgroundColor': '#1c273a',
+    'color': '#f0f0f0',
+    'border': '1px solid #2f3e54',
+    'padding': '8px',
+    'fontSize': '15px',
+    'fontFamily': 'Segoe UI, sans-serif',
+    'cursor': 'pointer',
+    'whiteSpace': 'normal',
+    'textAlign': 'center'
+}
+
+HEADER_STYLE = {
+    'backgroundColor': '#324863',
+    'color': '#ffffff',
+    'fontWeight': 'bold',
+    'fontSize': '14px',
+    'borderBottom': '2px solid #50657a',
+    'textAlign': 'center'
+}
+
+
+def squad_view(lineup, bench):
+    return html.Div(
+        [
+            html.H5("Starting XI", style={"textAlign": "center"}),
+            html.Div(dash_table.DataTable(columns=[{
+                "name": col,
+                "id": col
+            } for col in lineup['columns']],
+                                          data=lineup['records'],
+                                          style_cell=CELL_STYLE,
+                                          style_header=HEADER_STYLE,
+                                          page_action="none"),
+                     style={
+                         'maxWidth': '300px',
+                         'overflowY': 'auto',
+                         'margin': '0.5rem auto',
+                         'overflowX': 'auto'
+                     }),
+            html.H5("Bench",
+                    style={
+                        "marginTop": "1rem",
+                        "textAlign": "center"
+                    }),
+            html.Div(dash_table.DataTable(columns=[{
+                "name": col,
+                "id": col
+            } for col in bench['columns']],
+                                          data=bench['records'],
+                                          style_cell=CELL_STYLE,
+                                          style_header=HEADER_STYLE,
+                                          page_action="none"),
+                     style={
+                         'maxWidth': '300px',
+                         'overflowY': 'auto',
+                         'margin': '0.5rem auto',
+                         'overflowX': 'auto'
+                     }),
+        ],
+        style={
+            "flex": "0 0 250px",
+            "display": "flex",
+            "flexDirection": "column",
+            "justifyContent": "center",
+            "alignItems": "center",
+            "paddingTop": "1rem"
+        })
 
-    common_cell_style = {
-        'backgroundColor': '#1c273a',
-        'color': '#f0f0f0',
-        'border': '1px solid #2f3e54',
-        'padding': '8px',
-        'fontSize': '15px',
-        'fontFamily': 'Segoe UI, sans-serif',
-        'cursor': 'pointer',
-        'whiteSpace': 'normal',
-        'textAlign': 'center'
-    }
 
-    common_header_style = {
-        'backgroundColor': '#324863',
-        'color': '#ffffff',
-        'fontWeight': 'bold',
-        'fontSize': '14px',
-        'borderBottom': '2px solid #50657a',
-        'textAlign': 'center'
-    }
+def lineups_view(views):
+    return html.Div(
+        [
+            html.H4("Lineups", style={"textAlign": "center"}),
+            html.Div(
+                [
+                    #gospodarze
+                    squad_view(views['home_lineup'], views['home_bench']),
+
+                    #mapka
+                    html.Div(
+                        [
+                            dcc.Graph(figure=views['lineup_plot'],
+                                      config={"displayModeBar": False},
+                                      style={
+                                          "width": "100%",
+                                          "height": "auto"
+                                      })
+                        ],
+                        style={
+                            "flex": "1",
+                            "display": "flex",
+                            "justifyContent": "center",
+                            "alignItems": "flex-start",
+                            "paddingTop": "1rem"
+                        }),
+
+                    #goście
+                    squad_view(views['away_lineup'], views['away_bench']),
+                ],
+                style={
+                    "display": "flex",
+                    "justifyContent": "center",
+                    "gap": "4rem",
+                    "marginTop": "1rem"
+                }),
+        ],
+        style={
+            "maxWidth": "1300px",
+            "margin": "0 auto",
+            "padding": "1rem",
+            "boxSizing": "border-box"
+        })
 
+
+def events_view(views):
+    timeline = views['timeline']
+    return html.Div(
+        [
+            #timeline
+            html.Div(
+                [
+                    html.H4("Timeline", style={"textAlign": "center"}),
+                    dash_table.DataTable(columns=[{
+                        "name": col.capitalize(),
+                        "id": col
+                    } for col in timeline['columns']],
+                                         data=timeline['records'],
+                                         style_cell=CELL_STYLE,
+                                         style_header={"fontWeight": "bold"},
+                                         page_action="none",
+                                         style_table={
+                                             "marginTop": "1rem",
+                                             "marginBottom": "1rem",
+                                             "overflowX": "auto"
+                                         })
+                ],
+                style={
+                    "flex": "1",
+                    "display": "flex",
+                    "flexDirection": "column",
+                    "alignItems": "center",
+                    "minWidth": "360px"
+                }),
+
+            #mapa strzałów
+            html.Div(
+                [
+                    html.H4("Shots Map", style={"textAlign": "center"}),
+                    dcc.Graph(figure=views['shot_map'],
+                              config={"displayModeBar": False},
+                              style={
+                                  "width": "100%",
+                                  "maxWidth": "680px",
+                                  "margin": "0 auto"
+                              })
+                ],
+                style={
+                    "flex": "1",
+                    "display": "flex",
+                    "flexDirection": "column",
+                    "alignItems": "center",
+                    "minWidth": "360px"
+                })
+        ],
+        style={
+            "display": "flex",
+            "justifyContent": "center",
+            "alignItems": "flex-start",
+            "gap": "1rem",
+            "marginTop": "2rem",
+            "padding": "0 1rem",
+            "flexWrap": "wrap",
+            "width": "100%"
+        })
+
+
+def stats_view(views):
+    stats = views['stats']
+    return html.Div([
+        html.H4("Statistics", style={"textAlign": "center"}),
+        html.Div(
+            [
+                dash_table.DataTable(columns=[{
+                    "name": col,
+                    "id": col
+                } for col in stats['columns']],
+                                     data=stats['records'],
+                                     style_cell=CELL_STYLE,
+                                     style_cell_conditional=[{
+                                         'if': {
+                                             'column_id': col
+                                         },
+                                         'width': '33.33%'
+                                     } for col in stats['columns'][:3]],
+                                     style_header=HEADER_STYLE,
+                                     style_table={"width": "100%"})
+            ],
+            style={
+                "width": "50%",
+                "margin": "0 auto",
+                "marginTop": "2rem",
+                "marginBottom": "2rem"
+            })
+    ])
+
+
+def networks_view(views):
+    return html.Div([
+        html.H4("Passing networks", style={"textAlign": "center"}),
+        html.Div(
+            [
+                html.Div(pass_network_view(views[f'{side}_network'],
+                                           views[f'{side}_team']),
+                         style={
+                             "flex": "0 1 45%",
+                             "textAlign": "center",
+                             "display": "flex",
+                             "justifyContent": "center"
+                         }) for side in ('home', 'away')
+            ],
+            style={
+                "display": "flex",
+                "justifyContent": "center",
+                "alignItems": "flex-start",
+                "gap": "3rem",
+                "marginTop": "1rem",
+                "flexWrap": "wrap",
+                "padding": "0 1rem",
+                "width": "100%",
+                "boxSizing": "border-box"
+            })
+    ])
+
+
+def momentum_view(views):
+    return html.Div([
+        html.H3("Match momentum",
+                style={
+                    "textAlign": "center",
+                    "marginTop": "2rem"
+                }),
+        dcc.Graph(figure=views['xg_timeline'],
+                  config={"displayModeBar": False},
+                  style={
+                      "width": "100%",
+                      "maxWidth": "1200px",
+                      "margin": "0 auto"
+                  })
+    ],
+                    style={"marginBottom": "2rem"})
+
+
+VIEWS = {
+    'lineups': lineups_view,
+    'events': events_view,
+    'stats': stats_view,
+    'networks': networks_view,
+    'momentum': momentum_view,
+}
+
+
+def layout(match_id=None):
+    #od razu tylko nagłówek; sekcje liczone dopiero po otwarciu zakładki
     match_id = int(match_id)
-    match = matches_df[matches_df["match_id"] == match_id]
-    row = match.iloc[0]
-    events, lineups = get_match_data(match_id)
-    events, lineups = utils.apply_nicknames(events, lineups)
+    row = data.get_match(match_id)
     home_team, away_team = row['home_team'], row['away_team']
-    timeline_df = generate_timeline(match_id)
-    stats_df = generate_match_stats(events, lineups, row, home_team, away_team)
-    home_df, away_df, subs_home, subs_away = get_lineup_tables(
-        events, lineups, home_team, away_team)
 
     return html.Div(
         [
+            dcc.Store(id='match-id', data=match_id),
             html.Div(
                 [
                     html.Div(link_team(home_team),
@@ -642,297 +842,17 @@ def layout(match_id=None):
                   "textAlign": "center",
                   "fontSize": "1rem"
               }),
-
-            #składy
-            html.Div(
-                [
-                    html.H4("Lineups", style={"textAlign": "center"}),
-                    html.Div(
-                        [
-                            #gospodarze
-                            html.Div(
-                                [
-                                    html.H5("Starting XI",
-                                            style={"textAlign": "center"}),
-                                    html.Div(dash_table.DataTable(
-                                        columns=[{
-                                            "name": col,
-                                            "id": col
-                                        } for col in home_df.columns],
-                                        data=home_df.to_dict('records'),
-                                        style_cell=common_cell_style,
-                                        style_header=common_header_style,
-                                        page_action="none"),
-                                             style={
-                                                 'maxWidth': '300px',
-                                                 'overflowY': 'auto',
-                                                 'margin': '0.5rem auto',
-                                                 'overflowX': 'auto'
-                                             }),
-                                    html.H5("Bench",
-                                            style={
-                                                "marginTop": "1rem",
-                                                "textAlign": "center"
-                                            }),
-                                    html.Div(dash_table.DataTable(
-                                        columns=[{
-                                            "name": col,
-                                            "id": col
-                                        } for col in subs_home.columns],
-                                        data=subs_home.to_dict('records'),
-                                        style_cell=common_cell_style,
-                                        style_header=common_header_style,
-                                        page_action="none"),
-                                             style={
-                                                 'maxWidth': '300px',
-                                                 'overflowY': 'auto',
-                                                 'margin': '0.5rem auto',
-                                                 'overflowX': 'auto'
-                                             }),
-                                ],
-                                style={
-                                    "flex": "0 0 250px",
-                                    "display": "flex",
-                                    "flexDirection": "column",
-                                    "justifyContent": "center",
-                                    "alignItems": "center",
-                                    "paddingTop": "1rem"
-                                }),
-
-                            #mapka
-                            html.Div(
-                                [
-                                    dcc.Graph(
-                                        figure=draw_lineup_plot(match_id),
-                                        config={"displayModeBar": False},
-                                        style={
-                                            "width": "100%",
-                                            "height": "auto"
-                                        })
-                                ],
-                                style={
-                                    "flex": "1",
-                                    "display": "flex",
-                                    "justifyContent": "center",
-                                    "alignItems": "flex-start",
-                                    "paddingTop": "1rem"
-                                }),
-
-                            #goście
-                            html.Div(
-                                [
-                                    html.H5("Starting XI",
-                                            style={"textAlign": "center"}),
-                                    html.Div(dash_table.DataTable(
-                                        columns=[{
-                                            "name": col,
-                                            "id": col
-                                        } for col in away_df.columns],
-                                        data=away_df.to_dict('records'),
-                                        style_cell=common_cell_style,
-                                        style_header=common_header_style,
-                                        page_action="none"),
-                                             style={
-                                                 'maxWidth': '300px',
-                                                 'overflowY': 'auto',
-                                                 'margin': '0.5rem auto',
-                                                 'overflowX': 'auto'
-                                             }),
-                                    html.H5("Bench",
-                                            style={
-                                                "marginTop": "1rem",
-                                                "textAlign": "center"
-                                            }),
-                                    html.Div(dash_table.DataTable(
-                                        columns=[{
-                                            "name": col,
-                                            "id": col
-                                        } for col in subs_away.columns],
-                                        data=subs_away.to_dict('records'),
-                                        style_cell=common_cell_style,
-                                        style_header=common_header_style,
-                                        page_action="none"),
-                                             style={
-                                                 'maxWidth': '300px',
-                                                 'overflowY': 'auto',
-                                                 'margin': '0.5rem auto',
-                                                 'overflowX': 'auto'
-                                             }),
-                                ],
-                                style={
-                                    "flex": "0 0 250px",
-                                    "display": "flex",
-                                    "flexDirection": "column",
-                                    "justifyContent": "center",
-                                    "alignItems": "center",
-                                    "paddingTop": "1rem"
-                                }),
-                        ],
-                        style={
-                            "display": "flex",
-                            "justifyContent": "center",
-                            "gap": "4rem",
-                            "marginTop": "1rem"
-                        }),
-                ],
-                style={
-                    "maxWidth": "1300px",
-                    "margin": "0 auto",
-                    "padding": "1rem",
-                    "boxSizing": "border-box"
-                }),
-
-            #timeline+strzały
-            html.Div(
-                [
-                    #timeline
-                    html.Div(
-                        [
-                            html.H4("Timeline", style={"textAlign": "center"}),
-                            dash_table.DataTable(
-                                columns=[{
-                                    "name": col.capitalize(),
-                                    "id": col
-                                } for col in timeline_df.columns],
-                                data=timeline_df.to_dict('records'),
-                                style_cell=common_cell_style,
-                                style_header={"fontWeight": "bold"},
-                                page_action="none",
-                                style_table={
-                                    "marginTop": "1rem",
-                                    "marginBottom": "1rem",
-                                    "overflowX": "auto"
-                                })
-                        ],
-                        style={
-                            "flex": "1",
-                            "display": "flex",
-                            "flexDirection": "column",
-                            "alignItems": "center",
-                            "minWidth": "360px"
-                        }),
-
-                    #mapa strzałów
-                    html.Div(
-                        [
-                            html.H4("Shots Map", style={"textAlign": "center"
-                                                        }),
-                            dcc.Graph(figure=draw_shot_map(
-                                events, home_team, away_team),
-                                      config={"displayModeBar": False},
-                                      style={
-                                          "width": "100%",
-                                          "maxWidth": "680px",
-                                          "margin": "0 auto"
-                                      })
-                        ],
-                        style={
-                            "flex": "1",
-                            "display": "flex",
-                            "flexDirection": "column",
-                            "alignItems": "center",
-                            "minWidth": "360px"
-                        })
-                ],
-                style={
-                    "display": "flex",
-                    "justifyContent": "center",
-                    "alignItems": "flex-start",
-                    "gap": "1rem",
-                    "marginTop": "2rem",
-                    "padding": "0 1rem",
-                    "flexWrap": "wrap",
-                    "width": "100%"
-                }),
-            #tableka statystyk
-            html.Div([
-                html.H4("Statistics", style={"textAlign": "center"}),
-                html.Div(
-                    [
-                        dash_table.DataTable(columns=[{
-                            "name": col,
-                            "id": col
-                        } for col in stats_df.columns],
-                                             data=stats_df.to_dict('records'),
-                                             style_cell=common_cell_style,
-                                             style_cell_conditional=[
-                                                 {
-                                                     'if': {
-                                                         'column_id':
-                                                         stats_df.columns[0]
-                                                     },
-                                                     'width': '33.33%'
-                                                 },
-                                                 {
-                                                     'if': {
-                                                         'column_id':
-                                                         stats_df.columns[1]
-                                                     },
-                                                     'width': '33.33%'
-                                                 },
-                                                 {
-                                                     'if': {
-                                                         'column_id':
-                                                         stats_df.columns[2]
-                                                     },
-                                                     'width': '33.33%'
-                                                 },
-                                             ],
-                                             style_header=common_header_style,
-                                             style_table={"width": "100%"})
-                    ],
-                    style={
-                        "width": "50%",
-                        "margin": "0 auto",
-                        "marginTop": "2rem",
-                        "marginBottom": "2rem"
-                    })
-            ]),
-            #siatki podań
-            html.H4("Passing networks", style={"textAlign": "center"}),
-            html.Div(
-                [
-                    html.Div(draw_pass_network(events, home_team),
-                             style={
-                                 "flex": "0 1 45%",
-                                 "textAlign": "center",
-                                 "display": "flex",
-                                 "justifyContent": "center"
-                             }),
-                    html.Div(draw_pass_network(events, away_team),
-                             style={
-                                 "flex": "0 1 45%",
-                                 "textAlign": "center",
-                                 "display": "flex",
-                                 "justifyContent": "center"
-                             })
-                ],
-                style={
-                    "display": "flex",
-                    "justifyContent": "center",
-                    "alignItems": "flex-start",
-                    "gap": "3rem",
-                    "marginTop": "1rem",
-                    "flexWrap": "wrap",
-                    "padding": "0 1rem",
-                    "width": "100%",
-                    "boxSizing": "border-box"
-                }),
-            html.Div([
-                html.H3("Match momentum",
-                        style={
-                            "textAlign": "center",
-                            "marginTop": "2rem"
-                        }),
-                dcc.Graph(figure=draw_xg_timeline(events, home_team,
-                                                  away_team),
-                          config={"displayModeBar": False},
-                          style={
-                              "width": "100%",
-                              "maxWidth": "1200px",
-                              "margin": "0 auto"
-                          })
-            ],
-                     style={"marginBottom": "2rem"})
+            utils.lazy_tabs('match',
+                            [(key, label) for key, label, _ in SECTIONS]),
         ],
         style={"overflowX": "hidden"})
+
+
+@callback(Output('match-tab-content', 'children'), Input('match-tabs', 'value'),
+          State('match-id', 'data'))
+def render_match_tab(section, match_id):
+    if match_id is None or section not in VIEWS:
+        return dash.no_update
+    views = cache.get('match', f"{match_id}-{section}",
+                      lambda: render_match(match_id, section))
+    return VIEWS[section](views)
@@ -1,8 +1,10 @@
-from dash import html, dcc, dash_table, callback, Output, Input, register_page
+from dash import (ClientsideFunction, html, dcc, dash_table, callback,
+                  clientside_callback, Output, Input, State, register_page)
 import dash
-from pymongo import MongoClient
 import pandas as pd
-from utils import internal_team_id, apply_nicknames
+import aggregates
+import data
+from utils import internal_team_id, lazy_tabs, pitch_xy
 import numpy as np
 import plotly.graph_objects as go
 from plotly_football_pitch import make_pitch_figure, PitchDimensions, SingleColourBackground
@@ -11,31 +13,21 @@ from dash import html, dcc
 
 register_page(__name__, path_template="/team/<team_id>")
 
-client = MongoClient("mongodb://localhost:27017/")
-db = client["football_data"]
-lineups = pd.DataFrame(list(db.lineups.find()))
-lineups = apply_nicknames(lineups=lineups)
-matches = pd.DataFrame(list(db.matches.find()))
+def stat_total(team_stats, column):
+    return team_stats[column].sum() if column in team_stats.columns else 0
 
 
-def get_match_result_stats(events, matches_df, team_name):
-    team_matches = matches_df[(matches_df['home_team'] == team_name) |
-                              (matches_df['away_team'] == team_name)].copy()
+def get_team_summary(team_name):
+    #wiersz z data.get_results_summary(); zera dla drużyny bez meczów
+    summary = data.get_results_summary()
+    return summary.reindex([team_name]).fillna(0).astype(int).iloc[0]
 
-    played = len(team_matches)
 
-    def is_win(row):
-        return row['home_score'] > row['away_score'] if row[
-            'home_team'] == team_name else row['away_score'] > row['home_score']
-
-    def is_draw(row):
-        return row['home_score'] == row['away_score']
-
-    wins = team_matches.apply(is_win, axis=1).sum()
-    draws = team_matches.apply(is_draw, axis=1).sum()
-    losses = played - wins - draws
+def get_match_result_stats(summary):
+    played = summary['played']
+    wins, draws, losses = summary['wins'], summary['draws'], summary['losses']
     win_pct = f"{(wins / played) * 100:.1f}%" if played else "0.0%"
-    points = wins * 3 + draws
+    points = summary['points']
     ppm = f"{points / played:.2f}" if played else "0.00"
 
     return pd.DataFrame([{
@@ -49,42 +41,25 @@ def get_match_result_stats(events, matches_df, team_name):
     }])
 
 
-def get_scoring_offensive_stats(events, matches_df, team_name):
-    team_matches = matches_df[(matches_df['home_team'] == team_name) |
-                              (matches_df['away_team'] == team_name)].copy()
-
-    goals_scored = sum(row['home_score'] if row['home_team'] ==
-                       team_name else row['away_score']
-                       for _, row in team_matches.iterrows())
-    goals_conceded = sum(row['away_score'] if row['home_team'] ==
-                         team_name else row['home_score']
-                         for _, row in team_matches.iterrows())
-    goal_diff = goals_scored - goals_conceded
-    clean_sheets = sum((row['away_score'] == 0 if row['home_team'] ==
-                        team_name else row['home_score'] == 0)
-                       for _, row in team_matches.iterrows())
-    failed_to_score = sum((row['home_score'] == 0 if row['home_team'] ==
-                           team_name else row['away_score'] == 0)
-                          for _, row in team_matches.iterrows())
-
-    team_events = events[events['team'] == team_name]
-    shots = team_events[team_events['type'] == 'Shot']
-    on_target = shots[shots['shot_outcome'].isin(['Goal', 'Saved'])]
-    xg = shots['shot_statsbomb_xg'].sum()
-    accuracy = f"{(len(on_target) / len(shots)) * 100:.1f}%" if len(
-        shots) > 0 else "0.0%"
-
-    team_passes = events[(events['team'] == team_name)
-                         & (events['type'] == 'Pass')]
-    completed = team_passes[team_passes['pass_outcome'].isna()]
-    total_passes = len(team_passes)
-    pass_acc = f"{(len(completed) / total_passes) * 100:.1f}%" if total_passes > 0 else "0.0%"
-
-    possession_acts = events[events['type'].isin(
-        ['Pass', 'Carry', 'Ball Receipt'])]
-    total_acts = len(possession_acts)
-    team_pos = possession_acts[possession_acts['team'] == team_name]
-    avg_pos = f"{(len(team_pos) / total_acts) * 100:.1f}%" if total_acts > 0 else "0.0%"
+def get_scoring_offensive_stats(team_stats, summary):
+    goals_scored = summary['goals_for']
+    goals_conceded = summary['goals_against']
+    goal_diff = summary['goal_difference']
+    clean_sheets = summary['clean_sheets']
+    failed_to_score = summary['failed_to_score']
+
+    shots = stat_total(team_stats, 'shots')
+    on_target = stat_total(team_stats, 'shots_on_target')
+    xg = stat_total(team_stats, 'xg')
+    accuracy = f"{(on_target / shots) * 100:.1f}%" if shots > 0 else "0.0%"
+
+    total_passes = stat_total(team_stats, 'passes')
+    completed = stat_total(team_stats, 'passes_completed')
+    pass_acc = f"{(completed / total_passes) * 100:.1f}%" if total_passes > 0 else "0.0%"
+
+    team_pos = stat_total(team_stats, 'possession_events')
+    total_acts = team_pos + stat_total(team_stats, 'opponent_possession_events')
+    avg_pos = f"{(team_pos / total_acts) * 100:.1f}%" if total_acts > 0 else "0.0%"
 
     return pd.DataFrame({
         "Stat": [
@@ -96,51 +71,20 @@ def get_scoring_offensive_stats(events, matches_df, team_name):
         ],
         "Value": [
             goals_scored, goals_conceded, goal_diff, clean_sheets,
-            failed_to_score,
-            len(shots),
-            len(on_target), accuracy,
-            round(xg, 2), total_passes,
-            len(completed), pass_acc, avg_pos
+            failed_to_score, shots, on_target, accuracy,
+            round(xg, 2), total_passes, completed, pass_acc, avg_pos
         ]
     })
 
 
-def get_passing_possession_stats(events, team_name):
-    team_passes = events[(events['team'] == team_name)
-                         & (events['type'] == 'Pass')]
-    completed = team_passes[team_passes['pass_outcome'].isna()]
-    total_passes = len(team_passes)
-    pass_acc = f"{(len(completed) / total_passes) * 100:.1f}%" if total_passes > 0 else "0.0%"
-
-    possession_acts = events[events['type'].isin(
-        ['Pass', 'Carry', 'Ball Receipt'])]
-    total_acts = len(possession_acts)
-    team_pos = possession_acts[possession_acts['team'] == team_name]
-    avg_pos = f"{(len(team_pos) / total_acts) * 100:.1f}%" if total_acts > 0 else "0.0%"
-
-    return pd.DataFrame({
-        "Stat": [
-            "Passes Attempted", "Passes Completed", "Pass Accuracy",
-            "Average Possession"
-        ],
-        "Value": [total_passes,
-                  len(completed), pass_acc, avg_pos]
-    })
-
-
-def draw_team_shot_map(events, team_name):
+def draw_team_shot_map(shots):
     pitch_length, pitch_width = 120, 80
 
-    shots = events[(events['type'] == 'Shot') & (events['team'] == team_name) &
-                   (events['location'].notnull())].copy()
-
     if shots.empty:
         return go.Figure()
 
-    shots['x'] = shots['location'].apply(lambda loc: loc[0])
-    shots['y'] = shots['location'].apply(lambda loc: 80 - loc[1])
-    shots['x'] = pitch_length - shots['x']
-    shots['y'] = pitch_width - shots['y']
+    shots = shots.copy()
+    shots['x'], shots['y'] = pitch_xy(shots['x'], shots['y'], mirror=True)
 
     goals = shots[shots['shot_outcome'] == 'Goal']
     on_target = shots[shots['shot_outcome'] == 'Saved']
@@ -179,17 +123,7 @@ def draw_team_shot_map(events, team_name):
     return fig
 
 
-def get_team_result(row, team_name):
-    is_home = row['home_team'] == team_name
-    team_score = row['home_score'] if is_home else row['away_score']
-    opp_score = row['away_score'] if is_home else row['home_score']
-
-    if team_score > opp_score:
-        return '🟩'
-    elif team_score == opp_score:
-        return '🟨'
-    else:
-        return '🟥'
+RESULT_ICONS = {'W': '🟩', 'D': '🟨', 'L': '🟥'}
 
 
 def get_team_name(team_id):
@@ -198,6 +132,7 @@ def get_team_name(team_id):
 
 
 def get_team_players(team_name):
+    lineups = data.get_lineups()
     players = (lineups[lineups["team"] == team_name][[
         "jersey_number", "player_name", "player_id"
     ]].drop_duplicates("player_id").sort_values("jersey_number").rename(
@@ -209,13 +144,10 @@ def get_team_players(team_name):
 
 
 def get_team_matches(team_name):
-    team_matches = matches[(matches['home_team'] == team_name) |
-                           (matches['away_team'] == team_name)].copy()
-
-    team_matches["Score"] = team_matches.apply(
-        lambda row: f"{row['home_score']} : {row['away_score']}", axis=1)
-    team_matches["Result"] = team_matches.apply(
-        lambda row: get_team_result(row, team_name), axis=1)
+    team_matches = data.get_team_results(team_name).assign(
+        Score=lambda df: df['home_score'].astype(str) + " : " + df[
+            'away_score'].astype(str),
+        Result=lambda df: df['result'].map(RESULT_ICONS))
 
     table_data = team_matches[[
         "match_id", "match_week", "Result", "home_team", "Score", "away_team"
@@ -228,26 +160,19 @@ def get_team_matches(team_name):
     return table_data.sort_values("Week").to_dict("records")
 
 
-def get_top_scorers(events, team_name=None):
-    goals = events[(events['type'] == 'Shot')
-                   & (events['shot_outcome'] == 'Goal')].copy()
-
-    if team_name:
-        goals = goals[goals['team'] == team_name]
-
-    penalty_goals = goals[goals['shot_type'] == 'Penalty']
-    free_kick_goals = goals[goals['shot_type'] == 'Free Kick']
-
-    df = (goals.groupby(['player']).size().reset_index(name='Goals').merge(
-        penalty_goals.groupby('player').size().reset_index(name='Penalties'),
-        on='player',
-        how='left').merge(free_kick_goals.groupby('player').size().reset_index(
-            name='Free Kicks'),
-                          on='player',
-                          how='left').fillna(0))
-
-    df['Penalties'] = df['Penalties'].astype(int)
-    df['Free Kicks'] = df['Free Kicks'].astype(int)
+def get_top_scorers(team_goals):
+    #team_goals z aggregates.get_team_goals: jeden wiersz na strzelca
+    df = team_goals.groupby('player')[['goals', 'penalties',
+                                       'free_kicks']].sum().reset_index()
+    df = df.rename(columns={
+        'goals': 'Goals',
+        'penalties': 'Penalties',
+        'free_kicks': 'Free Kicks'
+    }).astype({
+        'Goals': int,
+        'Penalties': int,
+        'Free Kicks': int
+    })
     df['Open Play'] = df['Goals'] - df['Penalties'] - df['Free Kicks']
 
     df = df.sort_values('Goals', ascending=False).reset_index(drop=True)
@@ -257,17 +182,9 @@ def get_top_scorers(events, team_name=None):
     ]]
 
 
-def get_top_assistants(events, team_name=None):
-    goal_events = events[(events['type'] == 'Shot')
-                         & (events['shot_outcome'] == 'Goal')]
-    assist_ids = goal_events['shot_key_pass_id'].dropna()
-
-    assist_passes = events[events['id'].isin(assist_ids)]
-
-    if team_name:
-        assist_passes = assist_passes[assist_passes['team'] == team_name]
-
-    df = assist_passes.groupby('player').size().reset_index(name='Assists')
+def get_top_assistants(team_assists):
+    df = team_assists.groupby('player')['assists'].sum().reset_index(
+        name='Assists')
     df = df.sort_values('Assists', ascending=False).reset_index(drop=True)
     df.index += 1
     return df.rename(columns={'player': 'Player'})[['Player', 'Assists']]
@@ -277,8 +194,7 @@ import plotly.express as px
 from dash import html, dcc
 
 
-def draw_goals_treemap(events, team_name=None):
-    df = get_top_scorers(events, team_name)
+def draw_goals_treemap(df):
 
     fig = px.treemap(df,
                      path=['Player'],
@@ -309,57 +225,174 @@ def draw_goals_treemap(events, team_name=None):
                     })
 
 
-def layout(team_id=None):
-    common_cell_style = {
-        'backgroundColor': '#1c273a',
-        'color': '#f0f0f0',
-        'border': '1px solid #2f3e54',
-        'padding': '8px',
-        'textAlign': 'center',
-        'fontSize': '15px',
-        'fontFamily': 'Segoe UI, sans-serif',
-        'cursor': 'pointer'
-    }
-
-    common_header_style = {
-        'backgroundColor': '#324863',
-        'color': '#ffffff',
-        'fontWeight': 'bold',
-        'fontSize': '15px',
-        'borderBottom': '2px solid #50657a'
-    }
-
-    common_table_style = {
-        'maxWidth': '600px',
-        'maxHeight': '600px',
-        'overflowY': 'auto',
-        'margin': '1rem auto',
-        'overflowX': 'auto'
-    }
+CELL_STYLE = {
+    'backgroundColor': '#1c273a',
+    'color': '#f0f0f0',
+    'border': '1px solid #2f3e54',
+    'padding': '8px',
+    'textAlign': 'center',
+    'fontSize': '15px',
+    'fontFamily': 'Segoe UI, sans-serif',
+    'cursor': 'pointer'
+}
+
+HEADER_STYLE = {
+    'backgroundColor': '#324863',
+    'color': '#ffffff',
+    'fontWeight': 'bold',
+    'fontSize': '15px',
+    'borderBottom': '2px solid #50657a'
+}
+
+TABLE_STYLE = {
+    'maxWidth': '600px',
+    'maxHeight': '600px',
+    'overflowY': 'auto',
+    'margin': '1rem auto',
+    'overflowX': 'auto'
+}
+
+
+def scorers_view(team_name):
+    #strzelcy, asystenci
+    scorers_df = get_top_scorers(aggregates.get_team_goals(team_name))
+    assists_df = get_top_assistants(aggregates.get_team_assists(team_name))
+    return html.Div(
+        [
+            html.Div([
+                html.H4("Top Scorers", style={"textAlign": "center"}),
+                dash_table.DataTable(columns=[{
+                    "name": col,
+                    "id": col
+                } for col in scorers_df.columns],
+                                     data=scorers_df.to_dict("records"),
+                                     style_table={
+                                         'maxWidth': '600px',
+                                         'maxHeight': '375px',
+                                         'overflowY': 'scroll',
+                                         'margin': '1rem auto',
+                                         'overflowX': 'auto'
+                                     },
+                                     style_cell=CELL_STYLE,
+                                     style_header=HEADER_STYLE),
+                html.H4("Top Assistants",
+                        style={
+                            "textAlign": "center",
+                            "marginTop": "2rem"
+                        }),
+                dash_table.DataTable(columns=[{
+                    "name": col,
+                    "id": col
+                } for col in assists_df.columns],
+                                     data=assists_df.to_dict("records"),
+                                     style_table={
+                                         'maxWidth': '600px',
+                                         'maxHeight': '375px',
+                                         'overflowY': 'scroll',
+                                         'margin': '1rem auto',
+                                         'overflowX': 'auto'
+                                     },
+                                     style_cell=CELL_STYLE,
+                                     style_header=HEADER_STYLE)
+            ],
+                     style={
+                         "width": "50%",
+                         "margin": "0",
+                         "padding": "0"
+                     }),
+            html.Div([
+                html.H4("Goals by player",
+                        style={
+                            "textAlign": "center",
+                            "marginTop": "2rem"
+                        }),
+                draw_goals_treemap(scorers_df)
+            ],
+                     style={"flex": 1})
+        ],
+        style={
+            "display": "flex",
+            "justifyContent": "center",
+            "alignItems": "flex-start",
+            "margin": "1rem auto",
+            "padding": "0",
+            "gap": "4rem",
+            "maxWidth": "1400px",
+            "width": "100%"
+        })
+
+
+def shooting_view(team_name):
+    #atak i mapa strzałów
+    scoring_offensive_stats = get_scoring_offensive_stats(
+        data.get_team_season_stats(team_name), get_team_summary(team_name))
+    return html.Div(
+        [
+            html.Div([
+                html.H4("Scoring Stats", style={"textAlign": "center"}),
+                dash_table.DataTable(
+                    columns=[{
+                        "name": col,
+                        "id": col
+                    } for col in scoring_offensive_stats.columns],
+                    data=scoring_offensive_stats.to_dict("records"),
+                    style_table=TABLE_STYLE,
+                    style_cell=CELL_STYLE,
+                    style_header=HEADER_STYLE)
+            ],
+                     style={
+                         "flex": 1,
+                         "marginRight": "-200px"
+                     }),
+            html.Div([
+                html.H4("Shots Map",
+                        style={
+                            "textAlign": "center",
+                            "marginLeft": "-300px"
+                        }),
+                dcc.Graph(figure=draw_team_shot_map(
+                    aggregates.get_team_shots(team_name)),
+                          config={"displayModeBar": False},
+                          style={
+                              "width": "100%",
+                              "height": "100%",
+                              "maxWidth": "800px"
+                          })
+            ],
+                     style={
+                         "flex": 1,
+                         "alignItems": "flex-start"
+                     })
+        ],
+        style={
+            "display": "flex",
+            "justifyContent": "center",
+            "alignItems": "flex-center",
+            "margin": "1rem auto",
+            "padding": "0",
+            "gap": "4rem",
+            "width": "100%",
+            "marginRight": "-120px"
+        })
+
+
+TEAM_TABS = [('scorers', "Scorers & Assists"), ('shooting', "Shooting")]
+VIEWS = {'scorers': scorers_view, 'shooting': shooting_view}
 
+
+def layout(team_id=None):
+    #zestawienia z agregacji (strzelcy, mapa strzałów) liczone dopiero po
+    #otwarciu zakładki
     team_name = get_team_name(team_id)
     player_data = get_team_players(team_name)
     match_data = get_team_matches(team_name)
-    team_matches = matches[(matches['home_team'] == team_name) |
-                           (matches['away_team'] == team_name)]
-    match_ids = team_matches['match_id'].tolist()
-    events = pd.DataFrame(
-        list(db.events.find({"match_id": {
-            "$in": match_ids
-        }})))
-    events, _ = apply_nicknames(events=events, lineups=lineups)
-
-    scorers_df = get_top_scorers(events, team_name)
-    assists_df = get_top_assistants(events, team_name)
-
-    match_result_stats = get_match_result_stats(events, matches, team_name)
-    scoring_offensive_stats = get_scoring_offensive_stats(
-        events, matches, team_name)
+    summary = get_team_summary(team_name)
 
-    passing_possession_stats = get_passing_possession_stats(events, team_name)
+    match_result_stats = get_match_result_stats(summary)
 
     return html.Div([
         html.H1(f"👕 {team_name}", style={"textAlign": "center"}),
+        dcc.Store(id='team-name', data=team_name),
         dcc.Store(id='team-player-data', data=player_data),
         dcc.Store(id='team-match-data', data=match_data),
 
@@ -377,11 +410,11 @@ def layout(team_id=None):
                                  "boxShadow": "0 0 8px rgba(0,0,0,0.3)"
                              },
                              style_cell={
-                                 **common_cell_style, 'minWidth': '100px',
+                                 **CELL_STYLE, 'minWidth': '100px',
                                  'width': '100px',
                                  'maxWidth': '100px'
                              },
-                             style_header=common_header_style),
+                             style_header=HEADER_STYLE),
 
         #mecze i składy
         html.Div(
@@ -411,8 +444,8 @@ def layout(team_id=None):
                         }],
                         data=match_data,
                         style_as_list_view=True,
-                        style_cell=common_cell_style,
-                        style_header=common_header_style,
+                        style_cell=CELL_STYLE,
+                        style_header=HEADER_STYLE,
                         style_data_conditional=[{
                             'if': {
                                 'row_index': 'odd'
@@ -435,7 +468,7 @@ def layout(team_id=None):
                             },
                             'display': 'none'
                         }],
-                        style_table=common_table_style)
+                        style_table=TABLE_STYLE)
                 ],
                          style={
                              "width": "50%",
@@ -462,8 +495,8 @@ def layout(team_id=None):
                         ],
                         data=player_data,
                         style_as_list_view=True,
-                        style_cell=common_cell_style,
-                        style_header=common_header_style,
+                        style_cell=CELL_STYLE,
+                        style_header=HEADER_STYLE,
                         style_data_conditional=[{
                             'if': {
                                 'row_index': 'odd'
@@ -486,7 +519,7 @@ def layout(team_id=None):
                             },
                             'display': 'none'
                         }],
-                        style_table=common_table_style)
+                        style_table=TABLE_STYLE)
                 ],
                          style={
                              "width": "50%",
@@ -505,141 +538,28 @@ def layout(team_id=None):
                 "width": "100%"
             }),
 
-        #strzelcy, asystenci
-        html.Div(
-            [
-                html.Div([
-                    html.H4("Top Scorers", style={"textAlign": "center"}),
-                    dash_table.DataTable(columns=[{
-                        "name": col,
-                        "id": col
-                    } for col in scorers_df.columns],
-                                         data=scorers_df.to_dict("records"),
-                                         style_table={
-                                             'maxWidth': '600px',
-                                             'maxHeight': '375px',
-                                             'overflowY': 'scroll',
-                                             'margin': '1rem auto',
-                                             'overflowX': 'auto'
-                                         },
-                                         style_cell=common_cell_style,
-                                         style_header=common_header_style),
-                    html.H4("Top Assistants",
-                            style={
-                                "textAlign": "center",
-                                "marginTop": "2rem"
-                            }),
-                    dash_table.DataTable(columns=[{
-                        "name": col,
-                        "id": col
-                    } for col in assists_df.columns],
-                                         data=assists_df.to_dict("records"),
-                                         style_table={
-                                             'maxWidth': '600px',
-                                             'maxHeight': '375px',
-                                             'overflowY': 'scroll',
-                                             'margin': '1rem auto',
-                                             'overflowX': 'auto'
-                                         },
-                                         style_cell=common_cell_style,
-                                         style_header=common_header_style)
-                ],
-                         style={
-                             "width": "50%",
-                             "margin": "0",
-                             "padding": "0"
-                         }),
-                html.Div([
-                    html.H4("Goals by player",
-                            style={
-                                "textAlign": "center",
-                                "marginTop": "2rem"
-                            }),
-                    draw_goals_treemap(events, team_name)
-                ],
-                         style={"flex": 1})
-            ],
-            style={
-                "display": "flex",
-                "justifyContent": "center",
-                "alignItems": "flex-start",
-                "margin": "1rem auto",
-                "padding": "0",
-                "gap": "4rem",
-                "maxWidth": "1400px",
-                "width": "100%"
-            }),
-
-        #atak i mapa strzałów
-        html.Div(
-            [
-                html.Div([
-                    html.H4("Scoring Stats", style={"textAlign": "center"}),
-                    dash_table.DataTable(
-                        columns=[{
-                            "name": col,
-                            "id": col
-                        } for col in scoring_offensive_stats.columns],
-                        data=scoring_offensive_stats.to_dict("records"),
-                        style_table=common_table_style,
-                        style_cell=common_cell_style,
-                        style_header=common_header_style)
-                ],
-                         style={
-                             "flex": 1,
-                             "marginRight": "-200px"
-                         }),
-                html.Div([
-                    html.H4("Shots Map",
-                            style={
-                                "textAlign": "center",
-                                "marginLeft": "-300px"
-                            }),
-                    dcc.Graph(figure=draw_team_shot_map(events, team_name),
-                              config={"displayModeBar": False},
-                              style={
-                                  "width": "100%",
-                                  "height": "100%",
-                                  "maxWidth": "800px"
-                              })
-                ],
-                         style={
-                             "flex": 1,
-                             "alignItems": "flex-start"
-                         })
-            ],
-            style={
-                "display": "flex",
-                "justifyContent": "center",
-                "alignItems": "flex-center",
-                "margin": "1rem auto",
-                "padding": "0",
-                "gap": "4rem",
-                "width": "100%",
-                "marginRight": "-120px"
-            }),
+        lazy_tabs('team', TEAM_TABS),
         dcc.Location(id='team-url')
     ])
 
 
-@callback(Output('team-url', 'pathname'),
-          Input('team-players-table', 'active_cell'),
-          Input('team-player-data', 'data'))
-def go_to_player(active_cell, data):
-    if active_cell and data:
-        row = active_cell['row']
-        player_id = data[row]['player_id']
-        return f"/player/{player_id}"
-    return dash.no_update
-
-
-@callback(Output('team-url', 'pathname', allow_duplicate=True),
-          Input('team-matches-table', 'active_cell'),
-          Input('team-match-data', 'data'),
-          prevent_initial_call=True)
-def go_to_match(active_cell, data):
-    if active_cell and data:
-        row = active_cell['row']
-        match_id = data[row]['match_id']
-        return f"/match/{match_id}"
-    return dash.no_update
+#nawigacja w przeglądarce (assets/navigation.js)
+clientside_callback(
+    ClientsideFunction(namespace='navigation', function_name='teamPlayer'),
+    Output('team-url', 'pathname'), Input('team-players-table', 'active_cell'),
+    Input('team-player-data', 'data'))
+
+clientside_callback(
+    ClientsideFunction(namespace='navigation', function_name='teamMatch'),
+    Output('team-url', 'pathname', allow_duplicate=True),
+    Input('team-matches-table', 'active_cell'),
+    Input('team-match-data', 'data'),
+    prevent_initial_call=True)
+
+
+@callback(Output('team-tab-content', 'children'), Input('team-tabs', 'value'),
+          State('team-name', 'data'))
+def render_team_tab(section, team_name):
+    if team_name is None or section not in VIEWS:
+        return dash.no_update
+    return VIEWS[section](team_name)
@@ -0,0 +1,125 @@
+import bisect
+import re
+import unicodedata
+from collections import defaultdict
+
+import data
+
+#wyszukiwarka zawodników do listy w pasku nawigacji: nazwy i ksywki bez
+#akcentów i wielkości liter (Atletico == Atlético), indeks trigramów dla
+#zapytań od 3 znaków i posortowana lista słów dla krótszych prefiksów
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r'\s+', ' ', text.casefold()).strip()
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class PlayerIndex:
+
+    def __init__(self, players):
+        #players: player_id, player_name, player_nickname, team
+        self.entries = []
+        by_id = {}
+        for row in players.itertuples(index=False):
+            entry = by_id.get(row.player_id)
+            if entry is None:
+                nickname = row.player_nickname if isinstance(
+                    row.player_nickname, str) else None
+                entry = {
+                    'player_id': int(row.player_id),
+                    'player_name': nickname or row.player_name,
+                    'names': [],
+                    'teams': set(),
+                }
+                by_id[row.player_id] = entry
+                self.entries.append(entry)
+            for name in (row.player_name, row.player_nickname):
+                if isinstance(name, str) and normalize(name) not in entry[
+                        'names']:
+                    entry['names'].append(normalize(name))
+            if isinstance(row.team, str):
+                entry['teams'].add(row.team)
+
+        self.trigrams = defaultdict(set)
+        words = []
+        for i, entry in enumerate(self.entries):
+            for name in entry['names']:
+                for gram in trigrams(name):
+                    self.trigrams[gram].add(i)
+                words.extend((word, i) for word in re.split(r'[\s-]+', name))
+        self.words = sorted(set(words))
+
+    def candidates(self, query):
+        if len(query) >= 3:
+            grams = sorted(trigrams(query),
+                           key=lambda gram: len(self.trigrams.get(gram, ())))
+            found = set(self.trigrams.get(grams[0], ()))
+            for gram in grams[1:]:
+                found &= self.trigrams.get(gram, set())
+                if not found:
+                    break
+            return {
+                i
+                for i in found
+                if any(query in name for name in self.entries[i]['names'])
+            }
+        #krótkie zapytanie: prefiks dowolnego słowa nazwy
+        start = bisect.bisect_left(self.words, (query, -1))
+        found = set()
+        for word, i in self.words[start:]:
+            if not word.startswith(query):
+                break
+            found.add(i)
+        return found
+
+    def rank(self, i, query):
+        #najpierw początek nazwy, potem początek słowa, potem dowolne miejsce
+        names = self.entries[i]['names']
+        if any(name.startswith(query) for name in names):
+            tier = 0
+        elif any(
+                word.startswith(query) for name in names
+                for word in re.split(r'[\s-]+', name)):
+            tier = 1
+        else:
+            tier = 2
+        return tier, normalize(self.entries[i]['player_name'])
+
+    def search(self, query, team=None, limit=DEFAULT_LIMIT):
+        query = normalize(query or '')
+        if query:
+            found = self.candidates(query)
+        elif team:
+            found = range(len(self.entries))
+        else:
+            return []
+        if team:
+            found = [i for i in found if team in self.entries[i]['teams']]
+        ordered = sorted(found, key=lambda i: self.rank(i, query))
+        return [{
+            'player_id': self.entries[i]['player_id'],
+            'player_name': self.entries[i]['player_name'],
+            'teams': sorted(self.entries[i]['teams']),
+        } for i in ordered[:limit]]
+
+
+@data.memoized(maxsize=1)
+def get_index():
+    #budowany przy starcie aplikacji i po każdej zmianie wersji danych
+    return PlayerIndex(data.get_player_directory())
+
+
+def search_players(query, team=None, limit=DEFAULT_LIMIT):
+    if team and not normalize(query or ''):
+        #sama drużyna: cała kadra sezonu, jak dawny filtr listy
+        return get_index().search(query, team, limit=None)
+    return get_index().search(query, team, max(1, min(int(limit), MAX_LIMIT)))
@@ -0,0 +1,170 @@
+import bisect
+import threading
+
+import numpy as np
+import pandas as pd
+
+import data
+
+#tabela ligi po każdej kolejce: liczniki narastające drużyna × kolejka
+#liczone jednym przebiegiem cumsum, pozycje jednym lexsort dla wszystkich
+#kolejek; nowe kolejki są dopisywane bez przeliczania wcześniejszych
+
+COUNTERS = [
+    'played', 'points', 'wins', 'draws', 'losses', 'goals_for',
+    'goals_against', 'home_goals', 'away_goals', 'home_goals_conceded',
+    'away_goals_conceded'
+]
+
+TABLE_COLUMNS = {
+    'team': 'Team',
+    'points': 'PTS',
+    'goal_difference': 'DIFF',
+    'wins': 'W',
+    'draws': 'D',
+    'losses': 'L',
+    'goals_for': 'G',
+    'goals_against': 'GC',
+    'home_goals': 'Home G',
+    'away_goals': 'Away G',
+    'home_goals_conceded': 'H. GC',
+    'away_goals_conceded': 'A. GC'
+}
+
+
+def week_increments(results, teams, weeks):
+    #przyrost liczników w kolejce, tablica (kolejka, drużyna, licznik)
+    home = results['home'].to_numpy()
+    values = pd.DataFrame({
+        'week': results['match_week'].to_numpy(),
+        'team': results['team'].to_numpy(),
+        'played': 1,
+        'points': results['points'].to_numpy(),
+        'wins': results['win'].to_numpy(dtype=int),
+        'draws': results['draw'].to_numpy(dtype=int),
+        'losses': results['loss'].to_numpy(dtype=int),
+        'goals_for': results['goals_for'].to_numpy(),
+        'goals_against': results['goals_against'].to_numpy(),
+        'home_goals': np.where(home, results['goals_for'], 0),
+        'away_goals': np.where(home, 0, results['goals_for']),
+        'home_goals_conceded': np.where(home, results['goals_against'], 0),
+        'away_goals_conceded': np.where(home, 0, results['goals_against']),
+    })
+    grouped = values.groupby(['week', 'team'])[COUNTERS].sum()
+    index = pd.MultiIndex.from_product([weeks, teams])
+    grouped = grouped.reindex(index, fill_value=0)
+    return grouped.to_numpy(dtype=np.int64).reshape(len(weeks), len(teams),
+                                                     len(COUNTERS))
+
+
+def rank(totals):
+    #kolejność jak w tabeli: punkty, bilans, gole; przy remisie alfabetycznie
+    points = totals[..., COUNTERS.index('points')]
+    goals_for = totals[..., COUNTERS.index('goals_for')]
+    difference = goals_for - totals[..., COUNTERS.index('goals_against')]
+    order = np.lexsort((-goals_for, -difference, -points), axis=-1)
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order,
+                      np.arange(1, order.shape[-1] + 1)[None, :], axis=-1)
+    return order, positions
+
+
+class Standings:
+
+    def __init__(self, results=None):
+        self.source = None
+        self.match_ids = set()
+        self.teams = []
+        self.weeks = []
+        self.week_index = {}
+        self.totals = np.zeros((0, 0, len(COUNTERS)), dtype=np.int64)
+        self.order = np.zeros((0, 0), dtype=np.int64)
+        self.positions = np.zeros((0, 0), dtype=np.int64)
+        self.tables = {}
+        self.lock = threading.Lock()
+        if results is not None:
+            self.update(results)
+
+    def rebuild(self, results):
+        self.teams = sorted(results['team'].unique())
+        self.weeks = []
+        self.totals = np.zeros((0, len(self.teams), len(COUNTERS)),
+                               dtype=np.int64)
+        self.order = np.zeros((0, len(self.teams)), dtype=np.int64)
+        self.positions = np.zeros((0, len(self.teams)), dtype=np.int64)
+        self.match_ids = set()
+        self.append(results)
+
+    def append(self, results):
+        #tylko kolejki późniejsze niż już policzone
+        weeks = sorted(results['match_week'].unique())
+        increments = week_increments(results, self.teams, weeks)
+        last = self.totals[-1] if len(self.weeks) else 0
+        totals = np.cumsum(increments, axis=0) + last
+        order, positions = rank(totals)
+        self.totals = np.concatenate([self.totals, totals])
+        self.order = np.concatenate([self.order, order])
+        self.positions = np.concatenate([self.positions, positions])
+        self.weeks = self.weeks + [int(week) for week in weeks]
+        self.week_index = {week: i for i, week in enumerate(self.weeks)}
+        self.match_ids |= set(results['match_id'].tolist())
+
+    def update(self, results):
+        with self.lock:
+            if results is self.source:
+                return self
+            match_ids = set(results['match_id'].tolist())
+            new = results[~results['match_id'].isin(self.match_ids)]
+            if not self.weeks or not self.match_ids <= match_ids:
+                self.rebuild(results)
+            elif not new.empty:
+                if (new['match_week'].min() > self.weeks[-1]
+                        and set(new['team']) <= set(self.teams)):
+                    self.append(new)
+                else:
+                    #uzupełniony mecz z wcześniejszej kolejki
+                    self.rebuild(results)
+            self.tables = {}
+            self.source = results
+        return self
+
+    @property
+    def last_week(self):
+        return self.weeks[-1] if self.weeks else None
+
+    def table_as_of(self, week=None):
+        #tabela po danej kolejce (domyślnie ostatniej), gotowa do DataTable
+        week = self.last_week if week is None else int(week)
+        if week not in self.week_index:
+            #kolejka bez meczów: stan po ostatniej rozegranej
+            week = self.weeks[max(bisect.bisect_right(self.weeks, week) - 1, 0)]
+        if week in self.tables:
+            return self.tables[week]
+        i = self.week_index[week]
+        order = self.order[i]
+        table = pd.DataFrame(self.totals[i][order], columns=COUNTERS)
+        table.insert(0, 'team', np.asarray(self.teams, dtype=object)[order])
+        table['goal_difference'] = table['goals_for'] - table['goals_against']
+        table = table[list(TABLE_COLUMNS)].rename(columns=TABLE_COLUMNS)
+        table.insert(0, '#', np.arange(1, len(table) + 1))
+        table['team_id'] = table['Team']
+        self.tables[week] = table
+        return table
+
+    def history(self):
+        #punkty i pozycja każdej drużyny po każdej kolejce, format długi
+        return pd.DataFrame({
+            'match_week': np.repeat(self.weeks, len(self.teams)),
+            'team': np.tile(self.teams, len(self.weeks)),
+            'points': self.totals[..., COUNTERS.index('points')].ravel(),
+            'position': self.positions.ravel(),
+        })
+
+
+_standings = Standings()
+
+
+def get_standings():
+    #jedna instancja na proces; nowy ingest dopisuje kolejki przy kolejnym
+    #wywołaniu (get_results zmienia się razem z wersją danych)
+    return _standings.update(data.get_results())
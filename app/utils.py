@@ -1,75 +1,15 @@
-import pandas as pd
-
-#Funkcja do zmieniania pełnych nazwisk na ksywki (Lionel Andreas Messi Cuccitini > Lionel Messi)
-def apply_nicknames(events=None, lineups=None, starting_events=None):
-    nickname_dict = {}
-    full_name_dict = {}
-
-    if lineups is not None:
-        nickname_dict = {
-            row['player_id']: row['player_nickname']
-            for _, row in lineups.iterrows()
-            if pd.notnull(row['player_nickname'])
-        }
-
-        full_name_dict = {
-            row['player_name']: row['player_nickname']
-            for _, row in lineups.iterrows()
-            if pd.notnull(row['player_nickname'])
-        }
-
-        lineups['player_name'] = lineups.apply(
-            lambda row: row['player_nickname'] if pd.notnull(row['player_nickname']) else row['player_name'],
-            axis=1
-        )
-
-        for idx, row in lineups.iterrows():
-            player_id = row['player_id']
-            nickname = nickname_dict.get(player_id)
-            if nickname and isinstance(row.get('cards'), list):
-                for card in row['cards']:
-                    card['player_name'] = nickname
-
-    if events is not None:
-        if starting_events is None:
-            starting_events = events[events['type'] == 'Starting XI'].copy()
-
-        if 'player' in events.columns:
-            events['player'] = events.apply(
-                lambda row: nickname_dict.get(row.get('player_id'), row.get('player'))
-                if pd.notnull(row.get('player_id')) else row.get('player'),
-                axis=1
-            )
-
-        for idx in events[events['type'] == 'Substitution'].index:
-            player_id = events.at[idx, 'player_id']
-            sub_name = events.at[idx, 'substitution_replacement']
-
-            if player_id in nickname_dict:
-                events.at[idx, 'player'] = nickname_dict[player_id]
-
-            if pd.notnull(sub_name) and sub_name in full_name_dict:
-                events.at[idx, 'substitution_replacement'] = full_name_dict[sub_name]
-
-    if starting_events is not None and 'tactics' in starting_events.columns:
-        for idx in starting_events[starting_events['tactics'].notnull()].index:
-            lineup = starting_events.at[idx, 'tactics'].get('lineup', [])
-            for player in lineup:
-                pid = player['player']['id']
-                nickname = nickname_dict.get(pid)
-                if nickname:
-                    player['player']['name'] = nickname
-
-    if events is not None and lineups is not None:
-        return events, lineups
-    elif events is not None:
-        return events
-    elif lineups is not None:
-        return lineups
-    else:
-        raise ValueError("Musisz podać przynajmniej jeden z argumentów: `events` lub `lineups`.")
+import os
+import sys
 
+from dash import dcc, html
 
+#wspólny kod z katalogu głównego repozytorium (common.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import (CATEGORY, FLOAT, HEATMAP_SHAPE, INT, STRING,
+                    apply_nicknames, count_if, heatmap_counts, load_columns,
+                    nickname_maps, pass_network, pitch_xy, resolve_assists,
+                    results_summary, smooth_heatmaps, stored_data_version,
+                    team_results, with_dtypes)
 
 
 def get_coordinates():
@@ -132,4 +72,41 @@ def internal_team_id():
             'Celta Vigo' : 18,
             'Real Madrid' : 19,
             'Barcelona' : 20
-        } 
\ No newline at end of file
+        } 
+
+
+TAB_STYLE = {
+    'backgroundColor': '#1c273a',
+    'color': '#bbbbbb',
+    'border': '1px solid #2f3e54',
+    'padding': '8px',
+    'fontFamily': 'Segoe UI, sans-serif'
+}
+
+TAB_SELECTED_STYLE = {
+    **TAB_STYLE, 'backgroundColor': '#324863',
+    'color': '#ffffff',
+    'fontWeight': 'bold',
+    'borderTop': '2px solid #50657a'
+}
+
+
+def lazy_tabs(page, tabs, value=None):
+    #zakładki, których zawartość wypełnia callback strony dopiero po wybraniu
+    #(Input: f"{page}-tabs".value, Output: f"{page}-tab-content".children)
+    return html.Div([
+        dcc.Tabs(id=f"{page}-tabs",
+                 value=value or tabs[0][0],
+                 children=[
+                     dcc.Tab(label=label,
+                             value=key,
+                             style=TAB_STYLE,
+                             selected_style=TAB_SELECTED_STYLE)
+                     for key, label in tabs
+                 ],
+                 style={"marginTop": "1rem"}),
+        dcc.Loading(html.Div(id=f"{page}-tab-content",
+                             style={"minHeight": "400px"}),
+                    type="circle",
+                    color="#50657a")
+    ])
@@ -0,0 +1,19 @@
+import os
+
+import data
+
+#produkcyjny punkt wejścia: gunicorn -c gunicorn.conf.py wsgi:application
+#(z katalogu app), na Windows python wsgi.py (waitress, wątki w jednym
+#procesie). Dane sezonu i układy stron liczone są tu raz, przed forkiem.
+BIND = os.environ.get("BIND", "0.0.0.0:8050")
+WEB_THREADS = int(os.environ.get("WEB_THREADS", 4))
+
+data.preload()
+
+from app import app  #strony liczą swoje układy przy imporcie
+
+application = app.server
+
+if __name__ == "__main__":
+    from waitress import serve
+    serve(application, listen=BIND, threads=WEB_THREADS)
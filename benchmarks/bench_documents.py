@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from statsbombtomongo import build_documents
+
+N_EVENTS = 3500
+N_COLUMNS = 100
+REPEATS = 5
+
+
+#poprzednia wersja z statsbombtomongo.py, dla porównania
+def drop_nan_fields(records):
+    cleaned = []
+    for record in records:
+        cleaned_doc = {}
+        for key, val in record.items():
+            try:
+                if pd.notnull(val):
+                    cleaned_doc[key] = val
+            except:
+                cleaned_doc[key] = val
+        cleaned.append(cleaned_doc)
+    return cleaned
+
+
+def legacy(events, match_id):
+    events["match_id"] = match_id
+    event_data = events.to_dict(orient='records')
+    event_data = events.to_dict(orient='records')
+    return drop_nan_fields(event_data)
+
+
+def make_events(seed=0):
+    #rzadka ramka podobna do sb.events: kilka pełnych kolumn, reszta w ~5%
+    rng = np.random.default_rng(seed)
+    data = {
+        "id": [f"ev-{i}" for i in range(N_EVENTS)],
+        "type": rng.choice(["Pass", "Carry", "Ball Receipt", "Shot"], N_EVENTS),
+        "minute": rng.integers(0, 95, N_EVENTS),
+        "location": [[float(x), float(y)] for x, y in rng.random((N_EVENTS, 2)) * 100],
+    }
+    for c in range(N_COLUMNS - len(data)):
+        filled = rng.random(N_EVENTS) < 0.05
+        if c % 3 == 0:
+            col = np.where(filled, rng.random(N_EVENTS), np.nan)
+        elif c % 3 == 1:
+            col = np.where(filled, "value", None)
+        else:
+            col = [[1.0, 2.0] if f else np.nan for f in filled]
+        data[f"col_{c}"] = col
+    data["tactics"] = [{"formation": 433} if i < 2 else np.nan for i in range(N_EVENTS)]
+    return pd.DataFrame(data)
+
+
+def timeit(func):
+    best = float("inf")
+    for _ in range(REPEATS):
+        events = make_events()
+        start = time.perf_counter()
+        result = func(events)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    old_time, old_docs = timeit(lambda df: legacy(df, 1))
+    new_time, new_docs = timeit(lambda df: build_documents(df, match_id=1))
+    assert old_docs == new_docs, "wyniki różnią się"
+    print(f"{N_EVENTS} zdarzeń x {N_COLUMNS} kolumn")
+    print(f"drop_nan_fields: {old_time * 1000:.1f} ms")
+    print(f"build_documents: {new_time * 1000:.1f} ms")
+    print(f"przyspieszenie:  {old_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
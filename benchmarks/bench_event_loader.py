@@ -0,0 +1,172 @@
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+
+import bson
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from common import (CATEGORY, FLOAT, INT, STRING, LOAD_BATCH_SIZE,
+                    add_coordinates, load_columns)
+
+N_EVENTS = 60000
+REPEATS = 3
+
+#pola wspólne i pola zależne od typu, jak w zdarzeniach StatsBomb
+EVENT_TYPES = {
+    'Pass': 22,
+    'Ball Receipt': 2,
+    'Carry': 3,
+    'Pressure': 2,
+    'Shot': 18,
+    'Duel': 4,
+    'Clearance': 6,
+    'Dribble': 4,
+    'Foul Committed': 6,
+    'Goal Keeper': 10,
+    'Ball Recovery': 3,
+    'Interception': 2,
+}
+TEAMS = ['Barcelona', 'Real Madrid', 'Sevilla', 'Valencia']
+SCHEMA = {
+    'id': STRING,
+    'match_id': INT,
+    'type': CATEGORY,
+    'team': CATEGORY,
+    'player_id': FLOAT,
+    'player': CATEGORY,
+    'x': FLOAT,
+    'y': FLOAT,
+    'shot_outcome': CATEGORY,
+    'shot_type': CATEGORY,
+    'shot_key_pass_id': STRING
+}
+
+
+class Collection:
+    #partie BSON przygotowane z góry, tak jak zwraca je serwer; filtr i
+    #projekcja to praca serwera, więc nie wchodzą do pomiaru
+    def __init__(self, events):
+        self.events = events
+        self.encoded = {}
+
+    def batches(self, projection):
+        fields = [field for field in projection or {} if projection[field]]
+        key = tuple(fields)
+        if key not in self.encoded:
+            docs = self.events if not fields else [{
+                field: event[field] for field in fields if field in event
+            } for event in self.events]
+            self.encoded[key] = [
+                b''.join(bson.encode(doc) for doc in docs[i:i + LOAD_BATCH_SIZE])
+                for i in range(0, len(docs), LOAD_BATCH_SIZE)
+            ]
+        return self.encoded[key]
+
+    def find_raw_batches(self, query, projection=None, batch_size=None):
+        return iter(self.batches(projection))
+
+    def find(self, query, projection=None, batch_size=None):
+        for batch in self.batches(projection):
+            yield from bson.decode_all(batch)
+
+
+def make_events(seed=0):
+    rng = np.random.default_rng(seed)
+    types = list(EVENT_TYPES)
+    players = [f"Player {i}" for i in range(120)]
+    events = []
+    for i in range(N_EVENTS):
+        event_type = types[rng.integers(len(types))]
+        player = int(rng.integers(len(players)))
+        event = {
+            'id': str(uuid.UUID(int=int(rng.integers(2**62)))),
+            'index': i,
+            'period': 1 + i % 2,
+            'timestamp': f"00:{i % 60:02d}:{i % 59:02d}.000",
+            'minute': int(rng.integers(95)),
+            'second': int(rng.integers(60)),
+            'type': event_type,
+            'possession': i // 7,
+            'possession_team': TEAMS[(i // 7) % len(TEAMS)],
+            'play_pattern': 'Regular Play',
+            'team': TEAMS[player % len(TEAMS)],
+            'player': players[player],
+            'player_id': float(player),
+            'position': 'Center Forward',
+            'location': [round(float(rng.uniform(0, 120)), 1),
+                         round(float(rng.uniform(0, 80)), 1)],
+            'duration': float(rng.uniform(0, 3)),
+            'match_id': 3000 + i // 3500,
+            'related_events': [str(uuid.UUID(int=i))],
+        }
+        prefix = event_type.lower().replace(' ', '_')
+        for k in range(EVENT_TYPES[event_type]):
+            event[f"{prefix}_field_{k}"] = float(rng.uniform()) if k % 2 else 'x'
+        if event_type == 'Shot':
+            event['shot_outcome'] = ['Goal', 'Saved', 'Off T'][i % 3]
+            event['shot_type'] = ['Open Play', 'Penalty', 'Free Kick'][i % 3]
+            event['shot_key_pass_id'] = str(uuid.UUID(int=i + 1))
+        events.append(event)
+    #płaskie współrzędne zapisywane przy ingeście
+    coordinates = add_coordinates(pd.DataFrame({'location': [
+        event['location'] for event in events
+    ]}))
+    for event, x, y in zip(events, coordinates['x'], coordinates['y']):
+        event['x'], event['y'] = x, y
+    return events
+
+
+#poprzednia wersja z app/data.py: cały kursor do listy słowników
+def legacy(collection):
+    return pd.DataFrame(list(collection.find({})))
+
+
+def columnar(collection):
+    return load_columns(collection, {}, SCHEMA)
+
+
+def measure(func, collection):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func(collection)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    result = func(collection)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def as_objects(frame):
+    frame = frame[list(SCHEMA)].astype(object)
+    return frame.where(frame.notna(), None)
+
+
+def main():
+    collection = Collection(make_events())
+    collection.batches(None)
+    collection.batches({field: 1 for field in SCHEMA})
+
+    old_time, old_peak, old = measure(legacy, collection)
+    new_time, new_peak, new = measure(columnar, collection)
+
+    assert as_objects(old).equals(as_objects(new)), "ramki różnią się"
+
+    old_size = old.memory_usage(deep=True).sum()
+    new_size = new.memory_usage(deep=True).sum()
+    print(f"{N_EVENTS} zdarzeń, {old.shape[1]} kolumn -> {new.shape[1]}")
+    print(f"list(cursor):   {old_time * 1000:.0f} ms, szczyt "
+          f"{old_peak / 2**20:.0f} MB, ramka {old_size / 2**20:.0f} MB")
+    print(f"load_columns:   {new_time * 1000:.0f} ms, szczyt "
+          f"{new_peak / 2**20:.0f} MB, ramka {new_size / 2**20:.0f} MB")
+    print(f"przyspieszenie: {old_time / new_time:.1f}x, pamięć "
+          f"{old_peak / new_peak:.1f}x mniej")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.ndimage import gaussian_filter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from common import HEATMAP_SHAPE, heatmap_counts, smooth_heatmaps
+
+N_EVENTS = 3000
+REPEATS = 5
+
+
+#poprzednia wersja z app/pages/player.py (draw_map), dla porównania
+def legacy(player_events):
+    pitch_width, pitch_length = 80, 120
+    width_bins, length_bins = 40, 60
+    heatmap = np.zeros((width_bins, length_bins))
+    bin_width = pitch_width / width_bins
+    bin_length = pitch_length / length_bins
+
+    for _, row in player_events.iterrows():
+        x, y = row['x'], 80 - row['y']
+        col = int(x / bin_length)
+        row_ = int(y / bin_width)
+        if 0 <= row_ < width_bins and 0 <= col < length_bins:
+            heatmap[row_, col] += 1
+
+    if heatmap.max() > 0:
+        heatmap = heatmap / heatmap.max()
+    return gaussian_filter(heatmap, sigma=1.2)
+
+
+def batch(player_events):
+    #to, co derived.py liczy raz przy ingeście
+    counts = heatmap_counts(player_events['x'], player_events['y'])
+    return counts[0].max(), smooth_heatmaps(counts)[0].astype('<f2').tobytes()
+
+
+def load(stored):
+    #to, co zostaje na stronie zawodnika
+    peak, grid = stored
+    return np.frombuffer(grid, dtype='<f2').reshape(HEATMAP_SHAPE) / peak
+
+
+def make_events(seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'x': rng.uniform(0, 120, N_EVENTS).round(1),
+        'y': rng.uniform(0, 80, N_EVENTS).round(1),
+    })
+
+
+def timeit(func, arg):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    events = make_events()
+    old_time, old = timeit(legacy, events)
+    batch_time, stored = timeit(batch, events)
+    load_time, new = timeit(load, stored)
+
+    assert np.allclose(old, new, atol=1e-3), "mapy różnią się"
+
+    print(f"{N_EVENTS} zdarzeń, siatka {HEATMAP_SHAPE[0]}x{HEATMAP_SHAPE[1]} "
+          f"({len(stored[1])} B)")
+    print(f"iterrows + filtr:  {old_time * 1000:.2f} ms na żądanie")
+    print(f"bincount + filtr:  {batch_time * 1000:.2f} ms raz przy ingeście")
+    print(f"odczyt float16:    {load_time * 1000:.3f} ms na żądanie")
+    print(f"przyspieszenie:    {old_time / load_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+#przepustowość działających serwerów aplikacji, np. serwera deweloperskiego
+#(python app.py) i gunicorna (gunicorn -c gunicorn.conf.py wsgi:application);
+#każdy wątek klienta trzyma jedno połączenie keep-alive i na zmianę pobiera
+#strony (callback routera stron Dash) oraz wyszukiwarkę zawodników
+
+DEFAULT_PAGES = ["/", "/matches"]
+DEFAULT_SEARCHES = ["mes", "ra", "gri"]
+
+
+def page_request(pathname):
+    #to samo zapytanie, które wysyła przeglądarka po zmianie adresu
+    body = {
+        "output": ".._pages_content.children..._pages_store.data..",
+        "outputs": [{
+            "id": "_pages_content",
+            "property": "children"
+        }, {
+            "id": "_pages_store",
+            "property": "data"
+        }],
+        "inputs": [{
+            "id": "_pages_location",
+            "property": "pathname",
+            "value": pathname
+        }, {
+            "id": "_pages_location",
+            "property": "search",
+            "value": ""
+        }],
+        "changedPropIds": ["_pages_location.pathname"],
+        "state": []
+    }
+    return "POST", "/_dash-update-component", json.dumps(body)
+
+
+def search_request(query):
+    return "GET", f"/api/players?q={query}&limit=20", None
+
+
+def fetch(connection, request):
+    method, path, body = request
+    headers = {"Content-Type": "application/json"} if body else {}
+    connection.request(method, path, body=body, headers=headers)
+    response = connection.getresponse()
+    return response.status, response.read()
+
+
+def connect(url):
+    parts = urlsplit(url)
+    return http.client.HTTPConnection(parts.hostname, parts.port or 80,
+                                      timeout=120)
+
+
+def load(url, requests, concurrency, seconds):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(offset):
+        connection = connect(url)
+        done = []
+        failed = 0
+        i = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status, _ = fetch(connection, requests[i % len(requests)])
+                if status != 200:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = connect(url)
+            done.append(time.perf_counter() - start)
+            i += 1
+        connection.close()
+        with lock:
+            latencies.extend(done)
+            errors.append(failed)
+
+    threads = [
+        threading.Thread(target=client, args=(i, )) for i in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, np.array(latencies), sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Przepustowość serwerów aplikacji")
+    parser.add_argument("urls",
+                        nargs="+",
+                        help="adresy serwerów, pierwszy jest punktem odniesienia")
+    parser.add_argument("--page",
+                        action="append",
+                        help="ścieżka strony, np. /team/20 (można powtarzać)")
+    parser.add_argument("--concurrency",
+                        type=int,
+                        default=16,
+                        help="liczba równoległych klientów")
+    parser.add_argument("--seconds",
+                        type=float,
+                        default=20,
+                        help="czas pomiaru na serwer")
+    args = parser.parse_args()
+
+    requests = [page_request(page) for page in args.page or DEFAULT_PAGES]
+    requests += [search_request(query) for query in DEFAULT_SEARCHES]
+
+    #wszystkie serwery muszą zwracać te same odpowiedzi
+    expected = None
+    for url in args.urls:
+        connection = connect(url)
+        responses = [fetch(connection, request) for request in requests]
+        connection.close()
+        assert all(status == 200 for status, _ in responses), f"błąd: {url}"
+        if expected is None:
+            expected = responses
+        assert responses == expected, f"odpowiedzi różnią się: {url}"
+
+    baseline = None
+    print(f"{len(requests)} rodzajów zapytań, {args.concurrency} klientów, "
+          f"{args.seconds:.0f} s na serwer")
+    for url in args.urls:
+        rate, latencies, errors = load(url, requests, args.concurrency,
+                                       args.seconds)
+        baseline = baseline or rate
+        print(f"{url}: {rate:.1f} zapytań/s, mediana "
+              f"{np.median(latencies) * 1000:.0f} ms, p95 "
+              f"{np.percentile(latencies, 95) * 1000:.0f} ms, błędy {errors}, "
+              f"przyspieszenie {rate / baseline:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from common import results_summary, team_results
+
+N_TEAMS = 20
+REPEATS = 5
+
+
+#poprzednie wersje z app/pages/team.py i app/pages/home.py, dla porównania
+def legacy_result_stats(matches, team_name):
+    team_matches = matches[(matches['home_team'] == team_name) |
+                           (matches['away_team'] == team_name)].copy()
+
+    def is_win(row):
+        return row['home_score'] > row['away_score'] if row[
+            'home_team'] == team_name else row['away_score'] > row['home_score']
+
+    def is_draw(row):
+        return row['home_score'] == row['away_score']
+
+    wins = team_matches.apply(is_win, axis=1).sum()
+    draws = team_matches.apply(is_draw, axis=1).sum()
+    return len(team_matches), wins, draws, wins * 3 + draws
+
+
+def legacy_scoring_stats(matches, team_name):
+    team_matches = matches[(matches['home_team'] == team_name) |
+                           (matches['away_team'] == team_name)].copy()
+    goals_scored = sum(row['home_score'] if row['home_team'] ==
+                       team_name else row['away_score']
+                       for _, row in team_matches.iterrows())
+    goals_conceded = sum(row['away_score'] if row['home_team'] ==
+                         team_name else row['home_score']
+                         for _, row in team_matches.iterrows())
+    clean_sheets = sum((row['away_score'] == 0 if row['home_team'] ==
+                        team_name else row['home_score'] == 0)
+                       for _, row in team_matches.iterrows())
+    failed_to_score = sum((row['home_score'] == 0 if row['home_team'] ==
+                           team_name else row['away_score'] == 0)
+                          for _, row in team_matches.iterrows())
+    return goals_scored, goals_conceded, clean_sheets, failed_to_score
+
+
+def legacy_team_result(row, team_name):
+    is_home = row['home_team'] == team_name
+    team_score = row['home_score'] if is_home else row['away_score']
+    opp_score = row['away_score'] if is_home else row['home_score']
+    if team_score > opp_score:
+        return 'W'
+    elif team_score == opp_score:
+        return 'D'
+    return 'L'
+
+
+def legacy_team_matches(matches, team_name):
+    team_matches = matches[(matches['home_team'] == team_name) |
+                           (matches['away_team'] == team_name)].copy()
+    team_matches["Score"] = team_matches.apply(
+        lambda row: f"{row['home_score']} : {row['away_score']}", axis=1)
+    team_matches["Result"] = team_matches.apply(
+        lambda row: legacy_team_result(row, team_name), axis=1)
+    return team_matches.sort_values("match_week")[["match_id", "Result",
+                                                   "Score"]]
+
+
+def legacy_title_race_points(matches):
+    home = matches[['match_week', 'home_team', 'home_score',
+                    'away_score']].copy()
+    home.columns = ['match_week', 'team', 'goals_for', 'goals_against']
+    away = matches[['match_week', 'away_team', 'away_score',
+                    'home_score']].copy()
+    away.columns = ['match_week', 'team', 'goals_for', 'goals_against']
+    results = pd.concat([home, away], ignore_index=True)
+    results['points'] = results.apply(
+        lambda row: 3 if row['goals_for'] > row['goals_against'] else 1
+        if row['goals_for'] == row['goals_against'] else 0,
+        axis=1)
+    return results
+
+
+def legacy(matches):
+    teams = sorted(set(matches['home_team']))
+    stats = {
+        team: (legacy_result_stats(matches, team) +
+               legacy_scoring_stats(matches, team))
+        for team in teams
+    }
+    tables = {team: legacy_team_matches(matches, team) for team in teams}
+    return stats, tables, legacy_title_race_points(matches)['points']
+
+
+def vectorized(matches):
+    results = team_results(matches)
+    summary = results_summary(results)
+    stats = {
+        team: (row['played'], row['wins'], row['draws'], row['points'],
+               row['goals_for'], row['goals_against'], row['clean_sheets'],
+               row['failed_to_score'])
+        for team, row in summary.iterrows()
+    }
+    tables = {}
+    for team in summary.index:
+        team_matches = results[results['team'] == team].assign(
+            Score=lambda df: df['home_score'].astype(str) + " : " + df[
+                'away_score'].astype(str),
+            Result=lambda df: df['result'])
+        tables[team] = team_matches.sort_values("match_week")[[
+            "match_id", "Result", "Score"
+        ]]
+    return stats, tables, results['points']
+
+
+def make_season(seed=0):
+    #dwie rundy każdy z każdym (algorytm kołowy), jeden mecz drużyny w kolejce
+    rng = np.random.default_rng(seed)
+    teams = [f"Team {i}" for i in range(N_TEAMS)]
+    rounds = N_TEAMS - 1
+    rows = []
+    order = list(teams)
+    for week in range(rounds):
+        for k in range(N_TEAMS // 2):
+            home, away = order[k], order[-1 - k]
+            rows.append((week + 1, home, away))
+            rows.append((week + 1 + rounds, away, home))
+        order = [order[0], order[-1]] + order[1:-1]
+    matches = pd.DataFrame(rows,
+                           columns=['match_week', 'home_team', 'away_team'])
+    matches['match_id'] = np.arange(len(matches)) + 1
+    matches['home_score'] = rng.poisson(1.5, len(matches))
+    matches['away_score'] = rng.poisson(1.1, len(matches))
+    return matches
+
+
+def timeit(func, matches):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func(matches)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    matches = make_season()
+    old_time, (old_stats, old_tables, old_points) = timeit(legacy, matches)
+    new_time, (new_stats, new_tables, new_points) = timeit(vectorized, matches)
+
+    assert {t: tuple(map(int, s)) for t, s in old_stats.items()} == \
+        {t: tuple(map(int, s)) for t, s in new_stats.items()}, "bilans różni się"
+    for team, table in old_tables.items():
+        pd.testing.assert_frame_equal(table.reset_index(drop=True),
+                                      new_tables[team].reset_index(drop=True),
+                                      check_dtype=False)
+    assert old_points.tolist() == new_points.tolist(), "punkty różnią się"
+
+    print(f"{len(matches)} meczów, {N_TEAMS} drużyn")
+    print(f"apply/iterrows:    {old_time * 1000:.1f} ms")
+    print(f"team_results:      {new_time * 1000:.1f} ms")
+    print(f"przyspieszenie:    {old_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
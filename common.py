@@ -0,0 +1,373 @@
+from itertools import islice, repeat
+
+import bson
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    from pymongoarrow.api import Schema, find_arrow_all
+except ImportError:
+    find_arrow_all = None
+
+#wspólne funkcje aplikacji (app/utils.py) i notebooków (notebooks/utils.py)
+
+ASSIST_FIELDS = ['player', 'team']
+
+#rodzaje kolumn w schematach load_columns
+CATEGORY = 'category'
+STRING = 'string'
+FLOAT = 'float'
+INT = 'int'
+POINT = 'point'
+LOAD_BATCH_SIZE = 10000
+
+
+def nickname_maps(lineups):
+    #(id zawodnika -> ksywka, pełne nazwisko -> ksywka); budować z surowych
+    #składów, zanim player_name zostanie zamienione na ksywkę
+    if lineups is None or 'player_nickname' not in lineups.columns:
+        return {}, {}
+    named = lineups[lineups['player_nickname'].notna()]
+    by_id = dict(zip(named['player_id'], named['player_nickname']))
+    by_name = dict(zip(named['player_name'], named['player_nickname']))
+    return by_id, by_name
+
+
+#Funkcja do zmieniania pełnych nazwisk na ksywki (Lionel Andreas Messi Cuccitini > Lionel Messi)
+def apply_nicknames(events=None, lineups=None, starting_events=None, maps=None):
+    if events is None and lineups is None:
+        raise ValueError(
+            "Musisz podać przynajmniej jeden z argumentów: `events` lub `lineups`.")
+
+    by_id, by_name = maps if maps is not None else nickname_maps(lineups)
+
+    if lineups is not None:
+        if 'player_nickname' in lineups.columns:
+            lineups['player_name'] = lineups['player_nickname'].where(
+                lineups['player_nickname'].notna(), lineups['player_name'])
+
+        if 'cards' in lineups.columns:
+            for player_id, cards in zip(lineups['player_id'], lineups['cards']):
+                nickname = by_id.get(player_id)
+                if nickname and isinstance(cards, list):
+                    for card in cards:
+                        card['player_name'] = nickname
+
+    if events is not None:
+        if starting_events is None and 'tactics' in events.columns:
+            starting_events = events[events['type'] == 'Starting XI']
+
+        if 'player' in events.columns and 'player_id' in events.columns:
+            events['player'] = events['player_id'].map(by_id).fillna(
+                events['player'])
+
+        if 'substitution_replacement' in events.columns:
+            replacement = events['substitution_replacement']
+            events['substitution_replacement'] = replacement.map(
+                by_name).fillna(replacement)
+
+    if starting_events is not None and 'tactics' in starting_events.columns:
+        for tactics in starting_events['tactics'].dropna():
+            for player in tactics.get('lineup', []):
+                nickname = by_id.get(player['player']['id'])
+                if nickname:
+                    player['player']['name'] = nickname
+
+    if events is not None and lineups is not None:
+        return events, lineups
+    elif events is not None:
+        return events
+    return lineups
+
+
+def resolve_assists(goals, source, fields=None):
+    #podania kluczowe do goli; source to baza (jedno zapytanie $in zamiast
+    #find_one na każdego gola) albo ramka zdarzeń już wczytanych do pamięci.
+    #wynik ma indeks ramki goals, gole bez asysty są pominięte
+    fields = list(fields or ASSIST_FIELDS)
+    if 'shot_key_pass_id' not in goals.columns:
+        return pd.DataFrame(columns=fields)
+    key_pass_ids = goals['shot_key_pass_id'].dropna()
+
+    if isinstance(source, pd.DataFrame):
+        passes = source[(source['type'] == 'Pass')
+                        & source['id'].isin(key_pass_ids)]
+        passes = passes[['id'] + fields]
+    else:
+        projection = {'_id': 0, 'id': 1}
+        projection.update({field: 1 for field in fields})
+        passes = pd.DataFrame(
+            list(source.events.find(
+                {
+                    'type': 'Pass',
+                    'id': {
+                        '$in': key_pass_ids.unique().tolist()
+                    }
+                }, projection)),
+            columns=['id'] + fields)
+
+    passes = passes.drop_duplicates('id').set_index('id')
+    key_pass_ids = key_pass_ids[key_pass_ids.isin(passes.index)]
+    return passes.loc[key_pass_ids.values].set_axis(key_pass_ids.index)
+
+
+#wyrażenia potoków agregacji (derived.py, app/aggregates.py)
+def count_if(condition):
+    return {'$sum': {'$cond': [condition, 1, 0]}}
+
+
+def is_type(event_type):
+    return {'$eq': ['$type', event_type]}
+
+
+def is_missing(field):
+    return {'$eq': [{'$ifNull': [field, None]}, None]}
+
+
+def team_results(matches):
+    #jeden wiersz na drużynę w meczu (najpierw gospodarze, potem goście),
+    #liczony raz dla całej ligi
+    home_score = matches['home_score'].to_numpy()
+    away_score = matches['away_score'].to_numpy()
+    goals_for = np.concatenate([home_score, away_score])
+    goals_against = np.concatenate([away_score, home_score])
+    outcome = np.sign(goals_for - goals_against)
+
+    def both(column):
+        return np.tile(matches[column].to_numpy(), 2)
+
+    return pd.DataFrame({
+        'match_id': both('match_id'),
+        'match_week': both('match_week'),
+        'team': np.concatenate([matches['home_team'], matches['away_team']]),
+        'opponent': np.concatenate([matches['away_team'],
+                                    matches['home_team']]),
+        'home': np.repeat([True, False], len(matches)),
+        'home_team': both('home_team'),
+        'away_team': both('away_team'),
+        'home_score': both('home_score'),
+        'away_score': both('away_score'),
+        'goals_for': goals_for,
+        'goals_against': goals_against,
+        'win': outcome > 0,
+        'draw': outcome == 0,
+        'loss': outcome < 0,
+        'points': np.select([outcome > 0, outcome == 0], [3, 1], 0),
+        'result': np.select([outcome > 0, outcome == 0], ['W', 'D'], 'L'),
+        'clean_sheet': goals_against == 0,
+        'failed_to_score': goals_for == 0,
+    })
+
+
+def results_summary(results):
+    #bilans sezonu każdej drużyny z ramki team_results
+    summary = results.groupby('team').agg(
+        played=('match_id', 'size'),
+        wins=('win', 'sum'),
+        draws=('draw', 'sum'),
+        losses=('loss', 'sum'),
+        points=('points', 'sum'),
+        goals_for=('goals_for', 'sum'),
+        goals_against=('goals_against', 'sum'),
+        clean_sheets=('clean_sheet', 'sum'),
+        failed_to_score=('failed_to_score', 'sum'),
+    )
+    summary['goal_difference'] = summary['goals_for'] - summary['goals_against']
+    return summary
+
+
+#boisko StatsBomb 120 × 80, y rośnie w stronę dolnej linii bocznej
+PITCH_LENGTH = 120
+PITCH_WIDTH = 80
+#listy współrzędnych zdarzeń i płaskie pola liczbowe zapisywane przy ingeście
+COORDINATE_FIELDS = {
+    'location': ('x', 'y'),
+    'pass_end_location': ('end_x', 'end_y'),
+    'carry_end_location': ('end_x', 'end_y'),
+    'shot_end_location': ('end_x', 'end_y', 'end_z'),
+}
+
+
+def split_points(points, size=2):
+    #kolumna list [x, y(, z)] jako tablica (n, size), NaN tam, gdzie brak
+    points = pd.Series(points, dtype=object)
+    valid = points.notna().to_numpy()
+    out = np.full((len(points), size), np.nan)
+    if valid.any():
+        values = points[valid].tolist()
+        try:
+            array = np.array(values, dtype=float)[:, :size]
+        except ValueError:
+            #różne długości (np. shot_end_location bez wysokości)
+            array = np.array([(list(v) + [np.nan] * size)[:size]
+                              for v in values],
+                             dtype=float)
+        out[valid, :array.shape[1]] = array
+    return out
+
+
+def add_coordinates(events):
+    #płaskie x, y, end_x, end_y, end_z obok list współrzędnych
+    for field, names in COORDINATE_FIELDS.items():
+        if field not in events.columns:
+            continue
+        points = split_points(events[field], len(names))
+        for name, values in zip(names, points.T):
+            if name in events.columns:
+                values = np.where(np.isnan(values), events[name], values)
+            events[name] = values
+    return events
+
+
+def pitch_xy(x, y, mirror=None):
+    #współrzędne do rysowania: y od dolnej linii, a wiersze z maski mirror
+    #odbite na drugą połowę boiska
+    x = np.asarray(x, dtype=float)
+    y = PITCH_WIDTH - np.asarray(y, dtype=float)
+    if mirror is not None:
+        mirror = np.asarray(mirror, dtype=bool)
+        x = np.where(mirror, PITCH_LENGTH - x, x)
+        y = np.where(mirror, PITCH_WIDTH - y, y)
+    return x, y
+
+
+#siatka mapy cieplnej zawodnika: 40 × 60 pól 2 × 2 na boisku 80 × 120
+HEATMAP_SHAPE = (40, 60)
+HEATMAP_CELL = 2.0
+HEATMAP_SIGMA = 1.2
+
+
+def heatmap_counts(x, y, groups=None, n_groups=1):
+    #liczba zdarzeń w każdym polu, osobno dla każdej grupy (np. meczu);
+    #wiersze od góry boiska (80 - y), pola poza boiskiem pomijane
+    rows_, cols = HEATMAP_SHAPE
+    row = np.trunc((PITCH_WIDTH - np.asarray(y, dtype=float)) / HEATMAP_CELL)
+    col = np.trunc(np.asarray(x, dtype=float) / HEATMAP_CELL)
+    groups = (np.zeros(len(row), dtype=np.int64)
+              if groups is None else np.asarray(groups, dtype=np.int64))
+    inside = (row >= 0) & (row < rows_) & (col >= 0) & (col < cols)
+    cells = (groups[inside] * rows_ * cols + row[inside].astype(np.int64) * cols
+             + col[inside].astype(np.int64))
+    counts = np.bincount(cells, minlength=n_groups * rows_ * cols)
+    return counts.reshape(n_groups, rows_, cols)
+
+
+def smooth_heatmaps(counts):
+    #rozmycie każdej siatki osobno (bez rozmywania między grupami)
+    from scipy.ndimage import gaussian_filter
+    return gaussian_filter(counts.astype(float),
+                           sigma=(0, HEATMAP_SIGMA, HEATMAP_SIGMA))
+
+
+def pass_network(passes):
+    #sieć podań drużyny z celnych podań: średnia pozycja każdego podającego
+    #(y odwrócone jak na boisku) i liczba podań dla każdej pary; zawodnicy
+    #łączeni po id, bo pass_recipient nie ma ksywek
+    passes = passes[passes['x'].notna() & passes['end_x'].notna()
+                    & passes['player_id'].notna()]
+    x, y = pitch_xy(passes['x'], passes['y'])
+    located = pd.DataFrame({
+        'player_id': passes['player_id'].astype(np.int64),
+        'player': passes['player'],
+        'pass_recipient_id': passes['pass_recipient_id'],
+        'x': x,
+        'y': y,
+    })
+    nodes = located.groupby('player_id', sort=False).agg(
+        player=('player', 'first'),
+        x=('x', 'mean'),
+        y=('y', 'mean'),
+        passes=('x', 'size')).reset_index()
+    edges = located.dropna(subset=['pass_recipient_id']).astype(
+        {'pass_recipient_id': np.int64})
+    edges = edges.groupby(['player_id', 'pass_recipient_id'
+                           ]).size().reset_index(name='count')
+    edges = edges[edges['pass_recipient_id'].isin(nodes['player_id'])]
+    return nodes, edges.reset_index(drop=True)
+
+
+def _arrow_schema(schema):
+    types = {
+        CATEGORY: pa.string(),
+        STRING: pa.string(),
+        FLOAT: pa.float64(),
+        INT: pa.int64(),
+        POINT: pa.list_(pa.float64()),
+    }
+    return Schema({field: types[kind] for field, kind in schema.items()})
+
+
+def _document_batches(collection, query, projection, batch_size):
+    #surowe partie BSON dekodowane po kolei; słowniki żyją tylko do
+    #przepisania do kolumn
+    try:
+        batches = collection.find_raw_batches(query,
+                                              projection,
+                                              batch_size=batch_size)
+    except NotImplementedError:
+        #baza bez surowych partii (np. mongomock): zwykły kursor partiami
+        cursor = iter(collection.find(query, projection, batch_size=batch_size))
+        while docs := list(islice(cursor, batch_size)):
+            yield docs
+    else:
+        for batch in batches:
+            yield bson.decode_all(batch)
+
+
+def _column(values, kind):
+    if kind == CATEGORY:
+        return pd.Categorical(values)
+    if kind in (FLOAT, INT):
+        column = np.array([np.nan if v is None else v for v in values],
+                          dtype=np.float64)
+        if kind == INT and not np.isnan(column).any():
+            return column.astype(np.int64)
+        return column
+    if kind == POINT:
+        return pd.Series(values, dtype=object).to_numpy()
+    return np.array(values, dtype=object)
+
+
+def with_dtypes(frame, schema):
+    #typy ze schematu, np. ponownie po zamianie nazw na ksywki
+    for field, kind in schema.items():
+        if kind == CATEGORY and not isinstance(frame[field].dtype,
+                                               pd.CategoricalDtype):
+            frame[field] = frame[field].astype('category')
+    return frame
+
+
+def load_columns(collection, query, schema, batch_size=LOAD_BATCH_SIZE):
+    #zdarzenia wprost do kolumn, tylko pola ze schematu {pole: rodzaj}, bez
+    #ramki z jednym słownikiem na zdarzenie; pymongoarrow, jeśli jest
+    #zainstalowany, w przeciwnym razie partie BSON dekodowane w pythonie
+    fields = list(schema)
+    if find_arrow_all is not None:
+        table = find_arrow_all(collection,
+                               query,
+                               schema=_arrow_schema(schema),
+                               batch_size=batch_size)
+        frame = table.to_pandas()
+        for field, kind in schema.items():
+            if kind == POINT:
+                frame[field] = _column([
+                    None if v is None else v.tolist() for v in frame[field]
+                ], kind)
+        return with_dtypes(frame[fields], schema)
+
+    projection = {'_id': 0, **{field: 1 for field in fields}}
+    columns = {field: [] for field in fields}
+    for docs in _document_batches(collection, query, projection, batch_size):
+        for field, values in columns.items():
+            values.extend(map(dict.get, docs, repeat(field)))
+    return pd.DataFrame(
+        {field: _column(columns[field], schema[field]) for field in fields},
+        columns=fields)
+
+
+def stored_data_version(db):
+    #wersja danych podbijana przez derived.bump_data_version; zapisywana przy
+    #migawce i eksporcie Parquet, żeby aplikacja nie czytała starych plików
+    doc = db.meta.find_one({'_id': 'data_version'}) or {}
+    return f"{doc.get('version', 0)}-{doc.get('token', '')}"
@@ -0,0 +1,594 @@
+import uuid
+from collections import Counter, defaultdict
+from itertools import groupby
+
+import numpy as np
+import pandas as pd
+from bson import Binary
+from pymongo import MongoClient, ReplaceOne
+
+import season_store
+from common import (COORDINATE_FIELDS, HEATMAP_SHAPE, count_if,
+                    heatmap_counts, is_missing, is_type, pass_network,
+                    smooth_heatmaps)
+
+MONGO_URI = "mongodb://localhost:27017/"
+DB_NAME = "football_data"
+TEAM_MATCH_STATS_COLLECTION = "team_match_stats"
+PLAYER_SEASON_STATS_COLLECTION = "player_season_stats"
+PLAYER_HEATMAPS_COLLECTION = "player_heatmaps"
+PASS_NETWORKS_COLLECTION = "pass_networks"
+META_COLLECTION = "meta"
+
+POSSESSION_TYPES = ['Pass', 'Ball Receipt', 'Carry']
+YELLOW_CARDS = ['Yellow Card', 'Second Yellow']
+RED_CARDS = ['Red Card', 'Second Yellow']
+TOUCH_TYPES = [
+    'Pass', 'Carry', 'Dribble', 'Shot', 'Interception', 'Clearance', 'Block',
+    'Foul Won'
+]
+#początek każdej części meczu w minutach StatsBomb (druga połowa od 45:00 itd.)
+PERIOD_STARTS = {1: 0, 2: 45, 3: 90, 4: 105, 5: 120}
+DEFAULT_PERIOD_ENDS = {1: 45, 2: 90}
+
+
+def team_event_stats_pipeline(match_ids=None):
+    match = {'team': {'$exists': True}}
+    if match_ids is not None:
+        match['match_id'] = {'$in': list(match_ids)}
+    return [
+        {
+            '$match': match
+        },
+        {
+            '$group': {
+                '_id': {
+                    'match_id': '$match_id',
+                    'team': '$team'
+                },
+                'shots':
+                count_if(is_type('Shot')),
+                'shots_on_target':
+                count_if({
+                    '$and': [
+                        is_type('Shot'), {
+                            '$in': ['$shot_outcome', ['Goal', 'Saved']]
+                        }
+                    ]
+                }),
+                'xg': {
+                    '$sum': {
+                        '$cond': [
+                            is_type('Shot'), {
+                                '$ifNull': ['$shot_statsbomb_xg', 0]
+                            }, 0
+                        ]
+                    }
+                },
+                'passes':
+                count_if(is_type('Pass')),
+                'passes_completed':
+                count_if({'$and': [is_type('Pass'),
+                                   is_missing('$pass_outcome')]}),
+                'corners':
+                count_if({'$eq': ['$pass_type', 'Corner']}),
+                'free_kicks':
+                count_if({'$eq': ['$pass_type', 'Free Kick']}),
+                'penalties':
+                count_if({'$eq': ['$shot_type', 'Penalty']}),
+                'possession_events':
+                count_if({'$in': ['$type', POSSESSION_TYPES]}),
+            }
+        },
+    ]
+
+
+def cards_pipeline(match_ids=None):
+    match = {'cards.0': {'$exists': True}}
+    if match_ids is not None:
+        match['match_id'] = {'$in': list(match_ids)}
+    return [
+        {
+            '$match': match
+        },
+        {
+            '$unwind': '$cards'
+        },
+        {
+            '$group': {
+                '_id': {
+                    'match_id': '$match_id',
+                    'team': '$team'
+                },
+                'yellow_cards':
+                count_if({'$in': ['$cards.card_type', YELLOW_CARDS]}),
+                'red_cards':
+                count_if({'$in': ['$cards.card_type', RED_CARDS]}),
+            }
+        },
+    ]
+
+
+def build_team_match_stats(db, match_ids=None):
+    #jeden dokument na (mecz, drużynę) z tym, co strony meczu i drużyny
+    #liczyły wcześniej z surowych zdarzeń
+    query = {} if match_ids is None else {'match_id': {'$in': list(match_ids)}}
+    matches = {
+        m['match_id']: m
+        for m in db.matches.find(query, {
+            'match_id': 1,
+            'match_week': 1,
+            'home_team': 1,
+            'away_team': 1,
+            'home_score': 1,
+            'away_score': 1
+        })
+    }
+    event_stats = {(row['_id']['match_id'], row['_id']['team']): row
+                   for row in db.events.aggregate(
+                       team_event_stats_pipeline(matches.keys()),
+                       allowDiskUse=True)}
+    card_stats = {(row['_id']['match_id'], row['_id']['team']): row
+                  for row in db.lineups.aggregate(cards_pipeline(matches.keys()))}
+
+    docs = []
+    for match_id, match in matches.items():
+        sides = [(match['home_team'], match['away_team'], True),
+                 (match['away_team'], match['home_team'], False)]
+        for team, opponent, is_home in sides:
+            stats = event_stats.get((match_id, team), {})
+            opponent_stats = event_stats.get((match_id, opponent), {})
+            cards = card_stats.get((match_id, team), {})
+            docs.append({
+                'match_id': match_id,
+                'match_week': match.get('match_week'),
+                'team': team,
+                'opponent': opponent,
+                'home': is_home,
+                'goals': match['home_score'] if is_home else match['away_score'],
+                'goals_conceded':
+                match['away_score'] if is_home else match['home_score'],
+                'shots': stats.get('shots', 0),
+                'shots_on_target': stats.get('shots_on_target', 0),
+                'xg': stats.get('xg', 0.0),
+                'passes': stats.get('passes', 0),
+                'passes_completed': stats.get('passes_completed', 0),
+                'corners': stats.get('corners', 0),
+                'free_kicks': stats.get('free_kicks', 0),
+                'penalties': stats.get('penalties', 0),
+                'possession_events': stats.get('possession_events', 0),
+                'opponent_possession_events':
+                opponent_stats.get('possession_events', 0),
+                'yellow_cards': cards.get('yellow_cards', 0),
+                'red_cards': cards.get('red_cards', 0),
+            })
+
+    collection = db[TEAM_MATCH_STATS_COLLECTION]
+    if match_ids is None:
+        collection.delete_many({})
+    if docs:
+        collection.bulk_write([
+            ReplaceOne({
+                'match_id': doc['match_id'],
+                'team': doc['team']
+            },
+                       doc,
+                       upsert=True) for doc in docs
+        ],
+                              ordered=False)
+    return len(docs)
+
+
+def player_event_stats_pipeline():
+    return [
+        {
+            '$match': {
+                'player_id': {
+                    '$exists': True
+                }
+            }
+        },
+        {
+            '$group': {
+                '_id':
+                '$player_id',
+                'passes':
+                count_if(is_type('Pass')),
+                'passes_completed':
+                count_if({'$and': [is_type('Pass'),
+                                   is_missing('$pass_outcome')]}),
+                'dribbles':
+                count_if(is_type('Dribble')),
+                'dribbles_completed':
+                count_if({
+                    '$and':
+                    [is_type('Dribble'), {
+                        '$eq': ['$dribble_outcome', 'Complete']
+                    }]
+                }),
+                'shots':
+                count_if(is_type('Shot')),
+                'goals':
+                count_if({
+                    '$and': [is_type('Shot'), {
+                        '$eq': ['$shot_outcome', 'Goal']
+                    }]
+                }),
+                'xg': {
+                    '$sum': {
+                        '$cond': [
+                            is_type('Shot'), {
+                                '$ifNull': ['$shot_statsbomb_xg', 0]
+                            }, 0
+                        ]
+                    }
+                },
+                'fouls_committed':
+                count_if(is_type('Foul Committed')),
+                'fouls_won':
+                count_if(is_type('Foul Won')),
+                'carries':
+                count_if(is_type('Carry')),
+                'touches':
+                count_if({'$in': ['$type', TOUCH_TYPES]}),
+            }
+        },
+    ]
+
+
+def event_time(event):
+    return event.get('period', 1), event.get('minute', 0) + event.get(
+        'second', 0) / 60
+
+
+def stint_minutes(start, end, period_ends):
+    #czas gry między (część, minuta) wejścia i zejścia, z doliczonym czasem
+    #każdej części zgodnie z jej zdarzeniem Half End
+    minutes = 0.0
+    for period, period_end in period_ends.items():
+        if not start[0] <= period <= end[0]:
+            continue
+        lo = start[1] if period == start[0] else PERIOD_STARTS.get(period, 0)
+        hi = end[1] if period == end[0] else period_end
+        minutes += max(0.0, hi - lo)
+    return minutes
+
+
+def match_minutes(events):
+    #minuty, wyjścia w składzie, wejścia z ławki i pozycje w jednym meczu
+    period_ends = dict(DEFAULT_PERIOD_ENDS)
+    for event in events:
+        if event['type'] == 'Half End':
+            period, time = event_time(event)
+            period_ends[period] = max(time, period_ends.get(period, 0))
+    last_period = max(period_ends)
+    full_time = (last_period, period_ends[last_period])
+
+    starts, sub_ins, positions = set(), set(), defaultdict(Counter)
+    stints = {}
+    for event in sorted(events, key=event_time):
+        if event['type'] == 'Starting XI':
+            for player in event.get('tactics', {}).get('lineup', []):
+                player_id = player['player']['id']
+                starts.add(player_id)
+                positions[player_id][player['position']['name']] += 1
+                stints[player_id] = [(1, 0.0), None]
+        elif event['type'] == 'Substitution':
+            if event.get('player_id') in stints:
+                stints[event['player_id']][1] = event_time(event)
+            replacement = event.get('substitution_replacement_id')
+            if replacement is not None:
+                sub_ins.add(replacement)
+                stints[replacement] = [event_time(event), None]
+        elif (event.get('foul_committed_card') in RED_CARDS
+              or event.get('bad_behaviour_card') in RED_CARDS):
+            stint = stints.get(event.get('player_id'))
+            if stint is not None and stint[1] is None:
+                stint[1] = event_time(event)
+
+    minutes = {
+        player_id: stint_minutes(start, end or full_time, period_ends)
+        for player_id, (start, end) in stints.items()
+    }
+    return minutes, starts, sub_ins, positions
+
+
+def build_player_season_stats(db):
+    #minuty, występy i pełny zestaw statystyk (również na 90 minut) dla
+    #wszystkich zawodników jednocześnie
+    appearance_events = defaultdict(list)
+    for event in db.events.find(
+        {
+            '$or': [{
+                'type': {
+                    '$in': ['Starting XI', 'Substitution', 'Half End']
+                }
+            }, {
+                'foul_committed_card': {
+                    '$in': RED_CARDS
+                }
+            }, {
+                'bad_behaviour_card': {
+                    '$in': RED_CARDS
+                }
+            }]
+        }, {
+            '_id': 0,
+            'match_id': 1,
+            'type': 1,
+            'period': 1,
+            'minute': 1,
+            'second': 1,
+            'player_id': 1,
+            'substitution_replacement_id': 1,
+            'foul_committed_card': 1,
+            'bad_behaviour_card': 1,
+            'tactics.lineup.player.id': 1,
+            'tactics.lineup.position.name': 1
+        }):
+        appearance_events[event['match_id']].append(event)
+
+    minutes, starts, sub_ins = Counter(), Counter(), Counter()
+    positions = defaultdict(Counter)
+    for events in appearance_events.values():
+        match_mins, match_starts, match_subs, match_positions = match_minutes(
+            events)
+        minutes.update(match_mins)
+        starts.update(match_starts)
+        sub_ins.update(match_subs)
+        for player_id, counts in match_positions.items():
+            positions[player_id].update(counts)
+
+    event_stats = {
+        row.pop('_id'): row
+        for row in db.events.aggregate(player_event_stats_pipeline(),
+                                       allowDiskUse=True)
+    }
+
+    players = db.lineups.aggregate([{
+        '$sort': {
+            'match_id': 1
+        }
+    }, {
+        '$group': {
+            '_id': '$player_id',
+            'player_name': {
+                '$first': '$player_name'
+            },
+            'player_nickname': {
+                '$first': '$player_nickname'
+            },
+            'team': {
+                '$first': '$team'
+            },
+            'country': {
+                '$first': '$country'
+            },
+            'jersey_number': {
+                '$first': '$jersey_number'
+            },
+        }
+    }])
+
+    docs = []
+    for player in players:
+        player_id = player.pop('_id')
+        if not isinstance(player.get('player_nickname'), str):
+            player['player_nickname'] = None
+        played = minutes.get(player_id, 0.0)
+        stats = event_stats.get(player_id, {})
+        docs.append({
+            'player_id': player_id,
+            **player,
+            'minutes': round(played, 1),
+            'starts': starts.get(player_id, 0),
+            'sub_appearances': sub_ins.get(player_id, 0),
+            'appearances': starts.get(player_id, 0) + sub_ins.get(player_id, 0),
+            'positions': dict(positions.get(player_id, {})),
+            'stats': stats,
+            'per90': {
+                name: round(value * 90 / played, 2) if played > 0 else 0.0
+                for name, value in stats.items()
+            },
+        })
+
+    collection = db[PLAYER_SEASON_STATS_COLLECTION]
+    collection.delete_many({})
+    if docs:
+        collection.insert_many(docs)
+    return len(docs)
+
+
+def heatmap_doc(player_id, match_id, counts, grid):
+    #wygładzona siatka jako float16 (40 × 60 × 2 bajty) i maksimum surowych
+    #zliczeń, przez które strona zawodnika normalizuje mapę; niezerowe pola
+    #surowych zliczeń, żeby suma kilku meczów miała własne maksimum
+    cells = np.flatnonzero(counts)
+    return {
+        'player_id': int(player_id),
+        'match_id': match_id,
+        'events': int(counts.sum()),
+        'peak': int(counts.max()),
+        'shape': list(HEATMAP_SHAPE),
+        'grid': Binary(grid.astype('<f2').tobytes()),
+        'cells': Binary(cells.astype('<u2').tobytes()),
+        'counts': Binary(counts.ravel()[cells].astype('<u4').tobytes()),
+    }
+
+
+def player_heatmap_docs(player_id, events):
+    #dokument sezonu (match_id None) i po jednym na każdy mecz zawodnika
+    match_ids = np.array([event['match_id'] for event in events])
+    x = [event['x'] for event in events]
+    y = [event['y'] for event in events]
+    matches, groups = np.unique(match_ids, return_inverse=True)
+    counts = heatmap_counts(x, y, groups, len(matches))
+    season = counts.sum(axis=0)
+    docs = [
+        heatmap_doc(player_id, None, season,
+                    smooth_heatmaps(season[None])[0])
+    ]
+    for match_id, match_counts, grid in zip(matches, counts,
+                                            smooth_heatmaps(counts)):
+        docs.append(heatmap_doc(player_id, int(match_id), match_counts, grid))
+    return docs
+
+
+def build_player_heatmaps(db, match_ids=None):
+    #przy ingeście przyrostowym tylko zawodnicy z nowych meczów
+    query = {'player_id': {'$exists': True}, 'x': {'$exists': True}}
+    collection = db[PLAYER_HEATMAPS_COLLECTION]
+    if match_ids is not None:
+        players = db.events.distinct('player_id',
+                                     {'match_id': {
+                                         '$in': list(match_ids)
+                                     }})
+        query['player_id'] = {'$in': players}
+        collection.delete_many({'player_id': {'$in': players}})
+    else:
+        collection.delete_many({})
+
+    #zdarzenia posortowane po zawodniku, w pamięci tylko jeden naraz
+    cursor = db.events.find(query, {
+        '_id': 0,
+        'player_id': 1,
+        'match_id': 1,
+        'x': 1,
+        'y': 1
+    }).sort('player_id', 1)
+    count = 0
+    for player_id, events in groupby(cursor, key=lambda e: e['player_id']):
+        docs = player_heatmap_docs(player_id, list(events))
+        collection.insert_many(docs)
+        count += len(docs)
+    return count
+
+
+def build_pass_networks(db, match_ids=None):
+    #sieć podań dla każdej (mecz, drużyna): węzły i krawędzie gotowe do
+    #narysowania na stronie meczu
+    query = {
+        'type': 'Pass',
+        'pass_outcome': {
+            '$exists': False
+        },
+        'player_id': {
+            '$exists': True
+        },
+        'x': {
+            '$exists': True
+        },
+        'end_x': {
+            '$exists': True
+        }
+    }
+    collection = db[PASS_NETWORKS_COLLECTION]
+    if match_ids is not None:
+        query['match_id'] = {'$in': list(match_ids)}
+        collection.delete_many({'match_id': {'$in': list(match_ids)}})
+    else:
+        collection.delete_many({})
+
+    cursor = db.events.find(query, {
+        '_id': 0,
+        'match_id': 1,
+        'team': 1,
+        'player_id': 1,
+        'player': 1,
+        'pass_recipient_id': 1,
+        'x': 1,
+        'y': 1,
+        'end_x': 1,
+        'end_y': 1
+    }).sort('match_id', 1)
+    count = 0
+    for match_id, events in groupby(cursor, key=lambda e: e['match_id']):
+        passes = pd.DataFrame(list(events)).reindex(columns=[
+            'team', 'player_id', 'player', 'pass_recipient_id', 'x', 'y',
+            'end_x', 'end_y'
+        ])
+        docs = []
+        for team_name, team_passes in passes.groupby('team'):
+            nodes, edges = pass_network(team_passes)
+            docs.append({
+                'match_id': int(match_id),
+                'team': team_name,
+                'nodes': nodes.to_dict('records'),
+                'edges': edges.to_dict('records'),
+            })
+        if docs:
+            collection.insert_many(docs)
+            count += len(docs)
+    return count
+
+
+def backfill_coordinates(db):
+    #zdarzenia pobrane przed zapisywaniem płaskich współrzędnych: x, y,
+    #end_x, end_y, end_z liczone po stronie serwera jednym update_many na pole
+    count = 0
+    for field, names in COORDINATE_FIELDS.items():
+        query = {field: {'$exists': True}, names[0]: {'$exists': False}}
+        if db.events.find_one(query, {'_id': 1}) is None:
+            continue
+        result = db.events.update_many(query, [{
+            '$set': {
+                name: {
+                    '$arrayElemAt': [f"${field}", i]
+                } for i, name in enumerate(names)
+            }
+        }])
+        count += result.modified_count
+    return count
+
+
+def build_all(db, match_ids=None):
+    print("Współrzędne zdarzeń")
+    count = backfill_coordinates(db)
+    print(f"events: {count} uzupełnionych dokumentów")
+
+    print("Statystyki drużyn w meczach")
+    count = build_team_match_stats(db, match_ids)
+    print(f"{TEAM_MATCH_STATS_COLLECTION}: {count} dokumentów")
+
+    print("Statystyki zawodników w sezonie")
+    count = build_player_season_stats(db)
+    print(f"{PLAYER_SEASON_STATS_COLLECTION}: {count} dokumentów")
+
+    print("Mapy cieplne zawodników")
+    count = build_player_heatmaps(db, match_ids)
+    print(f"{PLAYER_HEATMAPS_COLLECTION}: {count} dokumentów")
+
+    print("Sieci podań")
+    count = build_pass_networks(db, match_ids)
+    print(f"{PASS_NETWORKS_COLLECTION}: {count} dokumentów")
+
+    bump_data_version(db)
+
+    #po podbiciu wersji, bo migawka zapisuje wersję, z której powstała
+    if season_store.STORE_DIR:
+        print("Migawka sezonu")
+        count = season_store.write_store(db, season_store.STORE_DIR)
+        print(f"{season_store.STORE_DIR}: {count} zdarzeń")
+
+
+def bump_data_version(db):
+    #aplikacja (app/data.py) czyści swoje pamięci podręczne po zmianie wersji;
+    #token jest unikalny także po usunięciu i odtworzeniu bazy (figure_cache
+    #trzyma wpisy na dysku)
+    db[META_COLLECTION].update_one({'_id': 'data_version'}, {
+        '$inc': {
+            'version': 1
+        },
+        '$set': {
+            'token': uuid.uuid4().hex
+        }
+    },
+                                   upsert=True)
+
+
+def main():
+    build_all(MongoClient(MONGO_URI)[DB_NAME])
+
+
+if __name__ == "__main__":
+    main()
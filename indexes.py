@@ -0,0 +1,184 @@
+import argparse
+import sys
+
+from pymongo import ASCENDING, IndexModel, MongoClient
+
+MONGO_URI = "mongodb://localhost:27017/"
+DB_NAME = "football_data"
+
+#wszystkie indeksy, których potrzebuje aplikacja (app/pages/*.py) i ingest
+INDEXES = {
+    "matches": [
+        IndexModel([("match_id", ASCENDING)], unique=True),
+    ],
+    "events": [
+        IndexModel([("match_id", ASCENDING), ("type", ASCENDING)]),
+        IndexModel([("id", ASCENDING)]),
+        IndexModel([("type", ASCENDING), ("team", ASCENDING)]),
+        IndexModel([("type", ASCENDING), ("shot_outcome", ASCENDING)]),
+        #zapytania zakresowe po strefach boiska, np. strzały z pola karnego
+        IndexModel([("type", ASCENDING), ("x", ASCENDING), ("y", ASCENDING)]),
+        IndexModel([("player_id", ASCENDING)]),
+        IndexModel([("pass_recipient_id", ASCENDING)]),
+        IndexModel([("substitution_replacement_id", ASCENDING)]),
+    ],
+    "lineups": [
+        IndexModel([("match_id", ASCENDING), ("team", ASCENDING)]),
+        IndexModel([("player_id", ASCENDING)]),
+    ],
+    "team_match_stats": [
+        IndexModel([("match_id", ASCENDING), ("team", ASCENDING)],
+                   unique=True),
+        IndexModel([("team", ASCENDING)]),
+    ],
+    "player_season_stats": [
+        IndexModel([("player_id", ASCENDING)], unique=True),
+    ],
+    "pass_networks": [
+        IndexModel([("match_id", ASCENDING), ("team", ASCENDING)],
+                   unique=True),
+    ],
+    "player_heatmaps": [
+        IndexModel([("player_id", ASCENDING), ("match_id", ASCENDING)],
+                   unique=True),
+    ],
+}
+
+
+def ensure_indexes(db):
+    #create_indexes nic nie robi, jeśli indeks o tej samej definicji już jest
+    for collection, models in INDEXES.items():
+        db[collection].create_indexes(models)
+
+
+def sample_values(db):
+    starting = db.events.find_one({"type": "Starting XI"}, {
+        "match_id": 1,
+        "team": 1
+    }) or {}
+    player = db.lineups.find_one({}, {"player_id": 1}) or {}
+    key_pass = db.events.find_one({"type": "Pass"}, {"id": 1}) or {}
+    match_ids = [
+        m["match_id"]
+        for m in db.matches.find({}, {"match_id": 1}).limit(38)
+    ]
+    return {
+        "match_id": starting.get("match_id", 0),
+        "match_ids": match_ids or [0],
+        "team": starting.get("team", ""),
+        "player_id": player.get("player_id", 0),
+        "pass_id": key_pass.get("id", ""),
+    }
+
+
+#kształty zapytań używanych przez strony aplikacji: (strona, kolekcja, filtr)
+QUERY_SHAPES = [
+    ("home", "events", lambda s: {
+        "$or": [{
+            "type": "Shot",
+            "shot_outcome": "Goal"
+        }, {
+            "type": "Own Goal For"
+        }]
+    }),
+    ("home", "events", lambda s: {
+        "type": "Pass",
+        "id": {
+            "$in": [s["pass_id"]]
+        }
+    }),
+    ("match_view", "events", lambda s: {
+        "match_id": s["match_id"]
+    }),
+    ("match_view", "lineups", lambda s: {
+        "match_id": s["match_id"]
+    }),
+    ("match_view", "team_match_stats", lambda s: {
+        "match_id": s["match_id"]
+    }),
+    ("match_view", "pass_networks", lambda s: {
+        "match_id": s["match_id"]
+    }),
+    ("team", "team_match_stats", lambda s: {
+        "team": s["team"]
+    }),
+    ("team", "events", lambda s: {
+        "type": "Shot",
+        "team": s["team"],
+        "shot_outcome": "Goal"
+    }),
+    ("team", "events", lambda s: {
+        "match_id": {
+            "$in": s["match_ids"]
+        },
+        "type": "Shot",
+        "shot_outcome": "Goal"
+    }),
+    ("team", "events", lambda s: {
+        "type": "Shot",
+        "team": s["team"],
+        "x": {
+            "$exists": True
+        }
+    }),
+    ("player", "player_season_stats", lambda s: {
+        "player_id": s["player_id"]
+    }),
+    ("player", "events", lambda s: {
+        "player_id": s["player_id"],
+        "type": "Shot"
+    }),
+    ("player", "player_heatmaps", lambda s: {
+        "player_id": s["player_id"],
+        "match_id": None
+    }),
+    ("player", "lineups", lambda s: {
+        "player_id": s["player_id"]
+    }),
+]
+
+
+def plan_stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from plan_stages(value)
+
+
+def audit(db):
+    samples = sample_values(db)
+    failures = []
+    for page, collection, build_filter in QUERY_SHAPES:
+        query = build_filter(samples)
+        explain = db[collection].find(query).explain()
+        stages = set(plan_stages(explain["queryPlanner"]["winningPlan"]))
+        status = "COLLSCAN" if "COLLSCAN" in stages else "OK"
+        print(f"[{status}] {page}: {collection}.find({query})")
+        if status != "OK":
+            failures.append((page, collection, query))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Indeksy kolekcji football_data")
+    parser.add_argument(
+        "--audit",
+        action="store_true",
+        help="sprawdź explain() zapytań aplikacji i zakończ błędem przy COLLSCAN")
+    args = parser.parse_args()
+
+    db = MongoClient(MONGO_URI)[DB_NAME]
+    ensure_indexes(db)
+    print("Indeksy utworzone.")
+
+    if args.audit and audit(db):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+from pymongo import MongoClient
+
+from common import (CATEGORY, FLOAT, INT, STRING, load_columns,
+                    stored_data_version)
+
+#migawka sezonu: kolumny zdarzeń o stałej szerokości w plikach .npy
+#otwieranych przez np.load(mmap_mode='r'), więc wszystkie procesy aplikacji
+#dzielą jedną kopię w pamięci podręcznej systemu; teksty jako kody ze
+#słownikami w meta.json. Wiersze posortowane po (match_id, index), więc
+#zdarzenia meczu to jeden wycinek, a zdarzenia zawodnika wskazuje indeks
+#player_rows. Pusty SEASON_STORE_DIR wyłącza migawkę.
+
+MONGO_URI = "mongodb://localhost:27017/"
+DB_NAME = "football_data"
+STORE_DIR = os.environ.get(
+    "SEASON_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "season_store"))
+
+#zmieniany przy każdej zmianie układu plików
+FORMAT = 2
+#kolumny liczbowe: (pole zdarzenia, typ w pliku); brak wartości to NaN
+#albo -1
+NUMERIC_COLUMNS = {
+    'match_id': np.int32,
+    'index': np.int32,
+    'period': np.int8,
+    'minute': np.int16,
+    'second': np.int16,
+    'player_id': np.int32,
+    'x': np.float64,
+    'y': np.float64,
+    'end_x': np.float64,
+    'end_y': np.float64,
+    'end_z': np.float64,
+    'shot_statsbomb_xg': np.float64,
+}
+#kolumny tekstowe zapisywane jako kody słownika
+CODED_COLUMNS = [
+    'type', 'team', 'player', 'shot_outcome', 'shot_type', 'pass_outcome'
+]
+SOURCE_SCHEMA = {
+    'id': STRING,
+    'shot_key_pass_id': STRING,
+    **{
+        field: (FLOAT if np.dtype(dtype).kind == 'f' else INT)
+        for field, dtype in NUMERIC_COLUMNS.items()
+    },
+    **{field: CATEGORY for field in CODED_COLUMNS},
+}
+
+
+def _strings(values):
+    return np.char.decode(values, 'ascii').astype(object)
+
+
+def _offsets(keys, values):
+    #początek wierszy każdej wartości w posortowanej tablicy keys
+    return np.searchsorted(keys, values).astype(np.int64)
+
+
+def write_store(db, path=None):
+    #path=None: STORE_DIR z chwili wywołania
+    path = STORE_DIR if path is None else path
+    if not path:
+        return 0
+    events = load_columns(db.events, {}, SOURCE_SCHEMA)
+    order = np.lexsort((events['index'].fillna(-1).to_numpy(),
+                        events['match_id'].fillna(-1).to_numpy()))
+    events = events.iloc[order].reset_index(drop=True)
+
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(tmp)
+    columns = {}
+    for field, dtype in NUMERIC_COLUMNS.items():
+        values = events[field].to_numpy(dtype=np.float64)
+        if np.dtype(dtype).kind == 'i':
+            values = np.where(np.isnan(values), -1, values)
+        columns[field] = values.astype(dtype)
+
+    dictionaries = {}
+    for field in CODED_COLUMNS:
+        column = events[field]
+        dictionaries[field] = [str(value) for value in column.cat.categories]
+        dtype = np.int16 if len(dictionaries[field]) < 2**15 else np.int32
+        columns[field] = column.cat.codes.to_numpy().astype(dtype)
+
+    #id StatsBomb jako napisy ASCII o stałej szerokości; podanie kluczowe
+    #jako numer wiersza, z którego id odczytuje frame()
+    columns['id'] = np.array(events['id'].fillna('').tolist(), dtype='S')
+    rows = pd.Series(np.arange(len(events)), index=events['id'])
+    rows = rows[~rows.index.duplicated()]
+    key_pass = events['shot_key_pass_id'].map(rows)
+    columns['key_pass_row'] = key_pass.fillna(-1).to_numpy().astype(np.int32)
+
+    match_ids = np.unique(columns['match_id'][columns['match_id'] >= 0])
+    columns['match_offsets'] = _offsets(
+        columns['match_id'], np.append(match_ids, np.iinfo(np.int32).max))
+    columns['match_ids'] = match_ids
+    player_rows = np.argsort(columns['player_id'], kind='stable')
+    player_rows = player_rows[columns['player_id'][player_rows] >= 0]
+    player_ids = np.unique(columns['player_id'][player_rows])
+    columns['player_rows'] = player_rows.astype(np.int32)
+    columns['player_ids'] = player_ids
+    columns['player_offsets'] = _offsets(
+        columns['player_id'][player_rows],
+        np.append(player_ids, np.iinfo(np.int32).max))
+
+    for name, values in columns.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), values)
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                'format': FORMAT,
+                'data_version': stored_data_version(db),
+                'rows': len(events),
+                'columns': list(columns),
+                'dictionaries': dictionaries,
+            },
+            f,
+            ensure_ascii=False)
+
+    #podmiana całego katalogu; otwarte mapowania starej wersji zostają ważne
+    old = f"{path}.{uuid.uuid4().hex}.old"
+    if os.path.exists(path):
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return len(events)
+
+
+class SeasonStore:
+
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.version = self.meta['data_version']
+        self.dictionaries = self.meta['dictionaries']
+        self.columns = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+            for name in self.meta['columns']
+        }
+
+    def match_rows(self, match_id):
+        match_ids = self.columns['match_ids']
+        i = np.searchsorted(match_ids, match_id)
+        if i == len(match_ids) or match_ids[i] != match_id:
+            return np.arange(0)
+        start, end = self.columns['match_offsets'][i:i + 2]
+        return np.arange(start, end)
+
+    def player_rows(self, player_id):
+        player_ids = self.columns['player_ids']
+        i = np.searchsorted(player_ids, player_id)
+        if i == len(player_ids) or player_ids[i] != player_id:
+            return np.arange(0)
+        start, end = self.columns['player_offsets'][i:i + 2]
+        return np.asarray(self.columns['player_rows'][start:end])
+
+    def frame(self, rows, schema):
+        #ramka z wybranych wierszy i pól schematu, z tymi samymi typami co
+        #common.load_columns (id jako napisy StatsBomb)
+        data = {}
+        for field, kind in schema.items():
+            if field == 'id':
+                data[field] = _strings(self.columns['id'][rows])
+            elif field == 'shot_key_pass_id':
+                key_pass = self.columns['key_pass_row'][rows]
+                values = _strings(self.columns['id'][np.maximum(key_pass, 0)])
+                values[key_pass < 0] = None
+                data[field] = values
+            elif field in self.dictionaries:
+                data[field] = pd.Categorical.from_codes(
+                    self.columns[field][rows], self.dictionaries[field])
+            else:
+                values = self.columns[field][rows]
+                if kind == INT:
+                    data[field] = values.astype(np.int64)
+                else:
+                    values = values.astype(np.float64)
+                    if field in NUMERIC_COLUMNS and np.dtype(
+                            NUMERIC_COLUMNS[field]).kind == 'i':
+                        values[values < 0] = np.nan
+                    data[field] = values
+        return pd.DataFrame(data, columns=list(schema))
+
+    def match_events(self, match_ids, schema):
+        rows = [self.match_rows(match_id) for match_id in match_ids]
+        return self.frame(np.concatenate(rows) if rows else np.arange(0),
+                          schema)
+
+    def player_events(self, player_id, schema):
+        return self.frame(self.player_rows(player_id), schema)
+
+
+def open_store(path=None, version=None):
+    #None, gdy migawki nie ma albo jest z innej wersji danych
+    path = STORE_DIR if path is None else path
+    if not path or not os.path.exists(os.path.join(path, "meta.json")):
+        return None
+    store = SeasonStore(path)
+    if store.meta.get('format') != FORMAT:
+        #migawka zapisana starszą wersją, do przebudowania przez derived.py
+        return None
+    if version is not None and store.version != version:
+        return None
+    return store
+
+
+def main():
+    count = write_store(MongoClient(MONGO_URI)[DB_NAME])
+    print(f"Migawka sezonu: {count} zdarzeń w {STORE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
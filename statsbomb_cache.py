@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import requests
+from statsbombpy import public
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DATA_PREFIX = "/data/"
+
+
+def loads(raw):
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+class RawCache:
+    #surowe odpowiedzi StatsBomb zapisane pod hashem treści (objects/),
+    #refs/ wskazuje, który obiekt odpowiada danemu adresowi
+    def __init__(self, cache_dir, offline=False):
+        self.root = Path(cache_dir)
+        self.offline = offline
+
+    def ref_path(self, url):
+        name = url.split(DATA_PREFIX, 1)[-1]
+        return self.root / "refs" / f"{name}.ref"
+
+    def object_path(self, digest):
+        return self.root / "objects" / digest[:2] / f"{digest}.json"
+
+    def write_atomic(self, path, data):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{id(data)}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def store(self, url, raw):
+        digest = hashlib.sha256(raw).hexdigest()
+        obj = self.object_path(digest)
+        if not obj.exists():
+            self.write_atomic(obj, raw)
+        self.write_atomic(self.ref_path(url), digest.encode("ascii"))
+        return digest
+
+    def load(self, url):
+        ref = self.ref_path(url)
+        if not ref.exists():
+            raise FileNotFoundError(f"Brak w cache: {url}")
+        digest = ref.read_text().strip()
+        return loads(self.object_path(digest).read_bytes())
+
+    def get_response(self, url):
+        if self.offline:
+            return self.load(url)
+        response = requests.get(url)
+        response.raise_for_status()
+        self.store(url, response.content)
+        return loads(response.content)
+
+
+def install(cache):
+    #sb.matches/events/lineups pobierają dane przez public.get_response,
+    #więc podmiana tej funkcji kieruje je przez cache bez zmian w DataFrame'ach
+    public.get_response = cache.get_response
+    return cache
@@ -1,83 +1,323 @@
+import argparse
+import hashlib
 import json
+import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
 import pandas as pd
 from statsbombpy import sb
-from pymongo import MongoClient
+from pymongo import MongoClient, ReplaceOne
+import analytics
+import derived
+import indexes
+import statsbomb_cache
+from common import add_coordinates, apply_nicknames, nickname_maps
 
 MONGO_URI = "mongodb://localhost:27017/"
 DB_NAME = "football_data"
 MATCHES_COLLECTION = "matches"
 EVENTS_COLLECTION = "events"
 LINEUPS_COLLECTION = "lineups"
+INGEST_STATE_COLLECTION = "ingest_state"
 
 COMPETITION_ID = 11
 SEASON_ID = 27
 
+DEFAULT_WORKERS = 4
+DEFAULT_RPS = 2.0
+DEFAULT_RETRIES = 3
+RETRY_BACKOFF = 1.0
+CACHE_DIR = "statsbomb_cache"
+#dokument w kolekcji meta z ustawieniem --display-names
+DISPLAY_NAMES_ID = "display_names"
+
 client = MongoClient(MONGO_URI)
 db = client[DB_NAME]
 
 matches_col = db[MATCHES_COLLECTION]
 events_col = db[EVENTS_COLLECTION]
 lineups_col = db[LINEUPS_COLLECTION]
+state_col = db[INGEST_STATE_COLLECTION]
 
-    
-def drop_nan_fields(records):
-    cleaned = []
-    for record in records:
-        cleaned_doc = {}
-        for key, val in record.items():
-            try:
-                if pd.notnull(val): 
-                    cleaned_doc[key] = val
-            except:
-                cleaned_doc[key] = val  
-        cleaned.append(cleaned_doc)
-    return cleaned
 
-print("Pobieranie meczów")
-matches = sb.matches(competition_id=COMPETITION_ID, season_id=SEASON_ID)
-match_data = matches.to_dict(orient='records')
+class RateLimiter:
+    #wspólny limit zapytań do StatsBomb dla wszystkich wątków
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
 
-matches_col.delete_many({})
-matches_col.insert_many(match_data)
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
 
-events_col.delete_many({})
-lineups_col.delete_many({})
 
-match_ids = matches["match_id"].tolist()
+def fetch_with_retry(func, *args, limiter=None, retries=DEFAULT_RETRIES):
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.wait()
+        try:
+            return func(*args)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = RETRY_BACKOFF * 2**attempt + random.uniform(
+                0, RETRY_BACKOFF)
+            print(f"Ponowienie {attempt + 1}/{retries} za {delay:.1f} s: {e}")
+            time.sleep(delay)
 
-for i, match_id in enumerate(match_ids, 1):
-    print(f"{i}/{len(match_ids)}")
 
-    try:
-        print("Pobieranie zdarzeń")
-        events = sb.events(match_id)
-        events["match_id"] = match_id
-        event_data = events.to_dict(orient='records')
-        event_data = events.to_dict(orient='records')
-        events_col.insert_many(drop_nan_fields(event_data))
-    except Exception as e:
-        print(e)
+def build_documents(df, drop_nan=True, **constants):
+    #budowa dokumentów kolumnami: maska NaN liczona raz na kolumnę, a puste
+    #komórki w ogóle nie trafiają do dokumentów (listy i słowniki zostają)
+    docs = [dict(constants) for _ in range(len(df))]
+    for col in df.columns:
+        series = df[col]
+        if drop_nan:
+            mask = series.notna().to_numpy()
+            if not mask.any():
+                continue
+            if not mask.all():
+                values = series[mask].tolist()
+                for i, val in zip(mask.nonzero()[0].tolist(), values):
+                    docs[i][col] = val
+                continue
+        for doc, val in zip(docs, series.tolist()):
+            doc[col] = val
+    return docs
+
+
+def content_hash(docs):
+    payload = json.dumps(docs, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def is_up_to_date(match, state):
+    return (state is not None and state.get("status") == "done"
+            and state.get("last_updated") == match.get("last_updated"))
+
+
+def write_events(match_id, event_docs, incremental):
+    if not incremental:
+        events_col.insert_many(event_docs)
+        return len(event_docs)
+
+    #upsert po id zdarzenia StatsBomb i usunięcie zdarzeń, których już nie ma
+    events_col.bulk_write(
+        [ReplaceOne({'id': doc['id']}, doc, upsert=True) for doc in event_docs],
+        ordered=False)
+    events_col.delete_many({
+        'match_id': match_id,
+        'id': {
+            '$nin': [doc['id'] for doc in event_docs]
+        }
+    })
+    return len(event_docs)
+
+
+def write_lineups(match_id, lineup_docs, incremental):
+    if incremental:
+        lineups_col.delete_many({'match_id': match_id})
+    lineups_col.insert_many(lineup_docs)
+    return len(lineup_docs)
+
+
+def ingest_match(match, state, limiter, retries, incremental,
+                 display_names=False):
+    #pobranie, przetworzenie i zapis jednego meczu; zwraca liczbę dokumentów
+    match_id = match["match_id"]
+    state = state or {}
+    inserted = 0
+    completed = True
+    hashes = {}
+    maps = None
 
     try:
-        print("Pobieranie składów")
-        lineups_data = sb.lineups(match_id)
-        lineup_docs = []
+        lineups_data = fetch_with_retry(sb.lineups,
+                                        match_id,
+                                        limiter=limiter,
+                                        retries=retries)
+        if display_names:
+            #mapy z surowych składów, zanim nazwiska zostaną zamienione
+            maps = nickname_maps(
+                pd.concat(lineups_data.values(), ignore_index=True))
+            for df in lineups_data.values():
+                apply_nicknames(lineups=df, maps=maps)
 
+        lineup_docs = []
         for team_name, df in lineups_data.items():
-            for _, row in df.iterrows():
-                player_doc = row.to_dict()
-                player_doc['team'] = team_name
-                player_doc['match_id'] = match_id
-                lineup_docs.append(player_doc)
+            lineup_docs.extend(
+                build_documents(df,
+                                drop_nan=False,
+                                team=team_name,
+                                match_id=match_id))
 
-        if lineup_docs:
-            lineups_col.insert_many(lineup_docs)
+        hashes['lineups_hash'] = content_hash(lineup_docs)
+        if lineup_docs and hashes['lineups_hash'] != state.get('lineups_hash'):
+            inserted += write_lineups(match_id, lineup_docs, incremental)
 
     except Exception as e:
-        print(e)
+        completed = False
+        print(f"Mecz {match_id}, składy: {e}")
+
+    try:
+        events = fetch_with_retry(sb.events,
+                                  match_id,
+                                  limiter=limiter,
+                                  retries=retries)
+        if display_names:
+            if maps is None:
+                raise RuntimeError("brak składów potrzebnych do ksywek")
+            apply_nicknames(events=events, maps=maps)
+        #x, y, end_x, end_y, end_z obok list, do zapytań zakresowych i map
+        add_coordinates(events)
+
+        event_docs = build_documents(events, match_id=match_id)
+        hashes['events_hash'] = content_hash(event_docs)
+        if event_docs and hashes['events_hash'] != state.get('events_hash'):
+            inserted += write_events(match_id, event_docs, incremental)
+    except Exception as e:
+        completed = False
+        print(f"Mecz {match_id}, zdarzenia: {e}")
+
+    #mecz oznaczony jako gotowy dopiero po zapisaniu zdarzeń i składów
+    if completed:
+        state_col.replace_one({'_id': match_id}, {
+            '_id': match_id,
+            'status': 'done',
+            'last_updated': match.get('last_updated'),
+            'ingested_at': datetime.now(timezone.utc),
+            **hashes
+        },
+                              upsert=True)
+
+    return inserted
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Pobieranie danych StatsBomb do MongoDB")
+    parser.add_argument("--workers",
+                        type=int,
+                        default=DEFAULT_WORKERS,
+                        help="liczba meczów przetwarzanych równolegle")
+    parser.add_argument("--rps",
+                        type=float,
+                        default=DEFAULT_RPS,
+                        help="limit zapytań do StatsBomb na sekundę (0 = bez limitu)")
+    parser.add_argument("--retries",
+                        type=int,
+                        default=DEFAULT_RETRIES,
+                        help="liczba ponowień nieudanego zapytania")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="pobierz tylko nowe lub zmienione mecze zamiast pełnego przeładowania")
+    parser.add_argument("--cache-dir",
+                        default=CACHE_DIR,
+                        help="katalog cache surowych odpowiedzi StatsBomb")
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="odbuduj bazę wyłącznie z cache, bez połączenia ze StatsBomb")
+    parser.add_argument(
+        "--display-names",
+        action="store_true",
+        help="zapisz ksywki zamiast pełnych nazwisk (aplikacja ich nie przelicza)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    statsbomb_cache.install(
+        statsbomb_cache.RawCache(args.cache_dir, offline=args.replay))
+    if args.replay:
+        args.rps = 0
+        args.retries = 0
+    limiter = RateLimiter(args.rps)
+    start = time.perf_counter()
+
+    print("Pobieranie meczów")
+    matches = fetch_with_retry(sb.matches,
+                               COMPETITION_ID,
+                               SEASON_ID,
+                               limiter=limiter,
+                               retries=args.retries)
+    match_data = matches.to_dict(orient='records')
+
+    if args.incremental:
+        matches_col.bulk_write([
+            ReplaceOne({'match_id': match['match_id']}, match, upsert=True)
+            for match in match_data
+        ])
+        indexes.ensure_indexes(db)
+        states = {state['_id']: state for state in state_col.find()}
+        #nazwy w bazie muszą być spójne, więc obowiązuje ustawienie z
+        #ostatniego pełnego pobrania
+        stored = (db[derived.META_COLLECTION].find_one(
+            {'_id': DISPLAY_NAMES_ID}) or {}).get('applied', False)
+        if stored != args.display_names:
+            print("Zmiana --display-names wymaga pełnego pobrania, "
+                  f"pozostaje {stored}")
+        args.display_names = stored
+    else:
+        matches_col.delete_many({})
+        matches_col.insert_many(match_data)
+        events_col.delete_many({})
+        lineups_col.delete_many({})
+        state_col.delete_many({})
+        states = {}
+        db[derived.META_COLLECTION].replace_one(
+            {'_id': DISPLAY_NAMES_ID}, {
+                '_id': DISPLAY_NAMES_ID,
+                'applied': args.display_names
+            },
+            upsert=True)
+    total_docs = len(match_data)
+
+    pending = [
+        match for match in match_data
+        if not is_up_to_date(match, states.get(match['match_id']))
+    ]
+    print(f"Do pobrania: {len(pending)}/{len(match_data)} meczów")
+
+    print(f"Pobieranie zdarzeń i składów ({args.workers} wątków, "
+          f"{args.rps} zapytań/s)")
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(ingest_match, match, states.get(match['match_id']),
+                        limiter, args.retries, args.incremental,
+                        args.display_names):
+            match['match_id']
+            for match in pending
+        }
+        for i, future in enumerate(as_completed(futures), 1):
+            docs = future.result()
+            total_docs += docs
+            print(f"{i}/{len(pending)} mecz {futures[future]}: {docs} dokumentów")
+
+    indexes.ensure_indexes(db)
+    derived.build_all(
+        db, [match['match_id'] for match in pending] if args.incremental else None)
+    if analytics.duckdb is not None and analytics.PARQUET_DIR:
+        print("Eksport Parquet")
+        counts = analytics.export_parquet(db, SEASON_ID,
+                                          analytics.PARQUET_DIR)
+        print(f"{analytics.PARQUET_DIR}: {counts.get('events', 0)} zdarzeń")
+
+    elapsed = time.perf_counter() - start
+    print(f"Pobrano wszystkie dane: {total_docs} dokumentów w {elapsed:.1f} s "
+          f"({total_docs / elapsed:.1f} docs/s).")
 
-    time.sleep(1)
-db.events.create_index([("type", 1), ("id", 1)])
 
-print("Pobrano wszystkie dane.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()